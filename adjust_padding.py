@@ -1,5 +1,17 @@
 #!/usr/bin/env python3
-import subprocess, json
+import subprocess, json, os, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# yabai answers each space's config separately, so talk to it in parallel
+MAX_WORKERS = 8
+
+# display uuid -> top padding, so a known monitor is never classified twice
+PROFILE_CACHE = Path.home() / ".cache" / "yabaduma" / "displays.json"
+
+# how long to wait for yabai to report a hotplugged display
+READY_TIMEOUT = 5.0
+READY_INTERVAL = 0.1
 
 def get_top_padding(display):
     w = display["frame"]["w"]
@@ -13,11 +25,100 @@ def get_top_padding(display):
     else:
         return "4"
 
-displays = json.loads(subprocess.check_output(["yabai", "-m", "query", "--displays"]))
-spaces = json.loads(subprocess.check_output(["yabai", "-m", "query", "--spaces"]))
+def load_profiles():
+    try:
+        return json.loads(PROFILE_CACHE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def save_profiles(profiles):
+    PROFILE_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = PROFILE_CACHE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(profiles, indent=2))
+    os.replace(tmp, PROFILE_CACHE)
+
+def resolve_paddings(displays):
+    profiles = load_profiles()
+    learned = False
+    paddings = {}
+    for display in displays:
+        uuid = display.get("uuid")
+        if uuid and uuid in profiles:
+            paddings[display["index"]] = profiles[uuid]
+            continue
+        paddings[display["index"]] = get_top_padding(display)
+        if uuid:
+            profiles[uuid] = paddings[display["index"]]
+            learned = True
+    if learned:
+        save_profiles(profiles)
+    return paddings
+
+def query(*args):
+    return json.loads(subprocess.check_output(["yabai", "-m", "query", *args]))
+
+def layout():
+    return query("--displays"), query("--spaces")
+
+def displays_ready(displays, spaces, added=(), removed=()):
+    # right after a hotplug yabai can still report the old display set
+    ids = {d.get("id") for d in displays}
+    indexes = {d["index"] for d in displays}
+    return (
+        ids >= set(added)
+        and not ids & set(removed)
+        and all(s["display"] in indexes for s in spaces)
+    )
+
+def wait_for_displays(added=(), removed=()):
+    # Poll until the ids from the signal have appeared or gone instead of
+    # sleeping; the daemon re-checks from its event loop rather than here.
+    deadline = time.monotonic() + READY_TIMEOUT
+    while True:
+        displays, spaces = layout()
+        ready = displays_ready(displays, spaces, added, removed)
+        if ready or time.monotonic() >= deadline:
+            return displays, spaces
+        time.sleep(READY_INTERVAL)
+
+def top_padding(index, value=None):
+    # without a value yabai prints the space's current padding
+    args = ["yabai", "-m", "config", "--space", str(index), "top_padding"]
+    if value is not None:
+        args.append(value)
+    return subprocess.run(args, capture_output=True, text=True).stdout.strip()
+
+def differs(current, wanted):
+    try:
+        return float(current) != float(wanted)
+    except ValueError:
+        return True
+
+def apply(displays, spaces, applied=None):
+    # applied maps space id -> the padding last set on it and is updated in
+    # place; only spaces missing from it are read back from yabai
+    if applied is None:
+        applied = {}
+    paddings = resolve_paddings(displays)
+    wanted = {
+        s["index"]: paddings[s["display"]]
+        for s in spaces if s["display"] in paddings
+    }
+    ids = {s["index"]: s["id"] for s in spaces}
+    unknown = [i for i in wanted if ids[i] not in applied]
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        current = {i: applied.get(ids[i]) for i in wanted}
+        current.update(zip(unknown, pool.map(top_padding, unknown)))
+        changed = [i for i, pad in wanted.items() if differs(current[i], pad)]
+        list(pool.map(top_padding, changed, [wanted[i] for i in changed]))
+
+    applied.clear()
+    applied.update((ids[i], pad) for i, pad in wanted.items())
+    return changed
+
+def main(added=(), removed=()):
+    return apply(*wait_for_displays(added, removed))
 
-for space in spaces:
-    disp = next((d for d in displays if d["index"] == space["display"]), None)
-    if disp:
-        pad = get_top_padding(disp)
-        subprocess.run(["yabai", "-m", "config", "--space", str(space["index"]), "top_padding", pad])
+if __name__ == "__main__":
+    main()
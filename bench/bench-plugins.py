@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from stubs import count_calls, make_stub_bin, stub_env
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+PLUGIN_DIR = REPO_DIR / "sketchybar" / "plugins"
+FORKSERVER = REPO_DIR / "sketchybar" / "forkserver.py"
+PLUGIN_CLIENT = REPO_DIR / "sketchybar" / "plugin-client.py"
+sys.path.insert(0, str(PLUGIN_DIR))
+
+from bar import read_runs  # noqa: E402
+
+# plugin -> environment sketchybar would pass it for a typical event
+PLUGIN_ENV = {
+    "space": {"NAME": "spaces", "SENDER": "space_change"},
+    "front_app": {"SENDER": "front_app_switched", "INFO": "kitty"},
+    "volume": {"SENDER": "volume_change", "INFO": "50"},
+}
+
+
+def discover_plugins() -> list[str]:
+    return sorted(
+        p.stem for p in PLUGIN_DIR.glob("*.py") if "\ndef main(" in p.read_text()
+    )
+
+
+def plugin_env(plugin: str) -> dict[str, str]:
+    env = {"NAME": plugin, "SENDER": "routine", "INFO": ""}
+    env.update(PLUGIN_ENV.get(plugin, {}))
+    return env
+
+
+def run_once(command: list[str], env: dict[str, str], workdir: Path) -> dict[str, float]:
+    log = workdir / "calls.log"
+    ring = workdir / "stats.ring"
+    log.unlink(missing_ok=True)
+    ring.unlink(missing_ok=True)
+
+    spawned = time.time()
+    subprocess.run(
+        command,
+        env=dict(env, BAR_STATS_FILE=str(ring)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    finished = time.time()
+
+    runs = read_runs(ring)
+    start, end = (runs[-1][1], runs[-1][2]) if runs else (spawned, finished)
+    return {
+        "cold_start": start - spawned,
+        "main": end - start,
+        "total": finished - spawned,
+        "procs": count_calls(log),
+    }
+
+
+def import_time(command: list[str], env: dict[str, str]) -> float:
+    result = subprocess.run(
+        [command[0], "-X", "importtime", *command[1:]],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or parts[2].startswith("  "):
+            continue
+        try:
+            total_us += int(parts[1])
+        except ValueError:
+            continue
+    return total_us / 1_000_000
+
+
+def bench_plugin(plugin, base_env, workdir, runs, launcher) -> dict[str, float]:
+    script = PLUGIN_DIR / f"{plugin}.py"
+    env = dict(base_env, **plugin_env(plugin))
+    samples = [run_once(launcher(script), env, workdir) for _ in range(runs)]
+    return {
+        "cold_start": statistics.median(s["cold_start"] for s in samples),
+        "import": import_time(launcher(script), env),
+        "main": statistics.median(s["main"] for s in samples),
+        "total": statistics.median(s["total"] for s in samples),
+        "total_max": max(s["total"] for s in samples),
+        "procs": statistics.median(s["procs"] for s in samples),
+    }
+
+
+def start_forkserver(env: dict[str, str], socket_path: Path) -> subprocess.Popen:
+    server = subprocess.Popen([sys.executable, str(FORKSERVER)], env=env)
+    deadline = time.monotonic() + 10
+    while not socket_path.exists():
+        if server.poll() is not None or time.monotonic() > deadline:
+            sys.exit("forkserver failed to start")
+        time.sleep(0.02)
+    return server
+
+
+def parse_delays(values: list[str]) -> dict[str, float]:
+    delays = {}
+    for value in values:
+        binary, _, seconds = value.partition("=")
+        delays[binary] = float(seconds)
+    return delays
+
+
+def print_table(results, baseline):
+    print(
+        f"{'plugin':<14}{'cold ms':>9}{'import ms':>11}{'main ms':>9}"
+        f"{'total ms':>10}{'max ms':>9}{'procs':>7}"
+    )
+    for plugin, r in results.items():
+        line = (
+            f"{plugin:<14}{r['cold_start'] * 1000:>9.1f}{r['import'] * 1000:>11.1f}"
+            f"{r['main'] * 1000:>9.1f}{r['total'] * 1000:>10.1f}"
+            f"{r['total_max'] * 1000:>9.1f}{r['procs']:>7.0f}"
+        )
+        if plugin in baseline:
+            before = baseline[plugin]["total"]
+            line += f"  {(r['total'] - before) / before * 100:+.0f}% vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark sketchybar plugins against stub system binaries"
+    )
+    parser.add_argument("plugins", nargs="*", help="plugins to run (default: all)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--delay",
+        action="append",
+        default=[],
+        metavar="BINARY=SECONDS",
+        help="latency of a stub binary, e.g. --delay osascript=0.08",
+    )
+    parser.add_argument(
+        "--forkserver",
+        action="store_true",
+        help="run plugins through the pre-warmed forkserver instead of a fresh interpreter",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument(
+        "--baseline", type=Path, help="JSON from an earlier run to compare against"
+    )
+    args = parser.parse_args()
+
+    plugins = args.plugins or discover_plugins()
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        bin_dir = make_stub_bin(workdir / "bin", parse_delays(args.delay))
+        base_env = stub_env(bin_dir, workdir / "calls.log")
+        base_env["BAR_SPACES_FILE"] = str(workdir / "spaces.json")
+        server = None
+
+        if args.forkserver:
+            socket_path = workdir / "forkserver.socket"
+            base_env["BAR_FORKSERVER_SOCKET"] = str(socket_path)
+            server = start_forkserver(base_env, socket_path)
+
+            def launcher(script):
+                return [sys.executable, "-I", "-S", str(PLUGIN_CLIENT), script.stem]
+
+        else:
+
+            def launcher(script):
+                return [sys.executable, str(script)]
+
+        try:
+            results = {
+                plugin: bench_plugin(plugin, base_env, workdir, args.runs, launcher)
+                for plugin in plugins
+            }
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from stubs import make_stub_bin, stub_env
+from yabai_sim import install, populate
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# scenario -> (script and arguments relative to the repo, extra environment).
+# populate() numbers windows from 1000, and 1000 starts out focused.
+SCENARIOS = {
+    "smart-swap": (["scripts/smart-swap.py", "east"], {}),
+    "resize-window": (["scripts/resize-window.py", "right"], {}),
+    "window-created": (["scripts/window-created.py"], {"YABAI_WINDOW_ID": "1000"}),
+    "scratchpad": (["scripts/scratchpad.py"], {}),
+    "adjust_padding": (["adjust_padding.py"], {}),
+    "space": (
+        ["sketchybar/plugins/space.py"],
+        {"NAME": "spaces", "SENDER": "space_change"},
+    ),
+    "front_app": (
+        ["sketchybar/plugins/front_app.py"],
+        {"NAME": "front_app", "SENDER": "front_app_switched"},
+    ),
+}
+
+
+def yabai_calls(log: Path) -> int:
+    try:
+        lines = log.read_text().splitlines()
+    except FileNotFoundError:
+        return 0
+    return sum(1 for line in lines if line.startswith("yabai "))
+
+
+def run_once(command, env, workdir, pristine) -> dict[str, float]:
+    # every run starts from the same layout, so one run never undoes another
+    shutil.copyfile(pristine, workdir / "state.json")
+    log = workdir / "calls.log"
+    log.unlink(missing_ok=True)
+
+    start = time.perf_counter()
+    subprocess.run(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    elapsed = time.perf_counter() - start
+    return {"total": elapsed, "yabai": yabai_calls(log)}
+
+
+def bench_scenario(name, base_env, workdir, pristine, runs) -> dict[str, float]:
+    script, extra = SCENARIOS[name]
+    command = [sys.executable, str(REPO_DIR / script[0]), *script[1:]]
+    env = dict(base_env, **extra)
+    samples = [run_once(command, env, workdir, pristine) for _ in range(runs)]
+    return {
+        "total": statistics.median(s["total"] for s in samples),
+        "total_max": max(s["total"] for s in samples),
+        "yabai": statistics.median(s["yabai"] for s in samples),
+    }
+
+
+def print_table(results, baseline):
+    print(f"{'scenario':<16}{'total ms':>10}{'max ms':>9}{'yabai':>7}")
+    for name, r in results.items():
+        line = (
+            f"{name:<16}{r['total'] * 1000:>10.1f}{r['total_max'] * 1000:>9.1f}"
+            f"{r['yabai']:>7.0f}"
+        )
+        if name in baseline:
+            before = baseline[name]["total"]
+            line += f"  {(r['total'] - before) / before * 100:+.0f}% vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the yabai scripts against a simulated yabai"
+    )
+    parser.add_argument(
+        "scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default: all)"
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--displays", type=int, default=2)
+    parser.add_argument("--spaces", type=int, default=10)
+    parser.add_argument("--windows", type=int, default=200)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.002,
+        help="seconds every simulated yabai command takes",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument(
+        "--baseline", type=Path, help="JSON from an earlier run to compare against"
+    )
+    args = parser.parse_args()
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        pristine = workdir / "layout.json"
+        pristine.write_text(
+            json.dumps(populate(args.displays, args.spaces, args.windows))
+        )
+
+        bin_dir = make_stub_bin(workdir / "bin")
+        base_env = stub_env(bin_dir, workdir / "calls.log")
+        base_env.update(install(bin_dir, workdir / "state.json"))
+        base_env.update(
+            YABAI_SIM_LATENCY=str(args.latency),
+            # keep caches and the daemon socket out of the real home directory
+            HOME=str(workdir / "home"),
+            YABAI_DAEMON_SOCKET=str(workdir / "yabai-daemon.socket"),
+            BAR_STATS_FILE=str(workdir / "stats.ring"),
+        )
+
+        results = {
+            name: bench_scenario(name, base_env, workdir, pristine, args.runs)
+            for name in names
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib.util
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from stubs import make_stub_bin, stub_env
+from yabai_sim import install, populate
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+PLUGIN_DIR = REPO_DIR / "sketchybar" / "plugins"
+FORKSERVER = REPO_DIR / "sketchybar" / "forkserver.py"
+PLUGIN_CLIENT = REPO_DIR / "sketchybar" / "plugin-client.py"
+DAEMON = REPO_DIR / "scripts" / "yabai-daemon.py"
+
+# latency percentiles are computed the same way bar-stats reports them
+_spec = importlib.util.spec_from_file_location(
+    "bar_stats", REPO_DIR / "sketchybar" / "bar-stats.py"
+)
+bar_stats = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bar_stats)
+percentile = bar_stats.percentile
+
+# after the last event, wait until nothing has called a stub binary for this
+# long, so debounced daemon handlers are counted too
+SETTLE = 0.5
+SETTLE_TIMEOUT = 15.0
+
+
+def load_events(path: Path) -> list[dict]:
+    events = []
+    for line in path.read_text().splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if entry.get("src") in ("bar", "yabai"):
+            events.append(entry)
+    return sorted(events, key=lambda e: e["t"])
+
+
+def wait_for_socket(proc: subprocess.Popen, path: Path, name: str) -> None:
+    deadline = time.monotonic() + 10
+    while not path.exists():
+        if proc.poll() is not None or time.monotonic() > deadline:
+            sys.exit(f"{name} failed to start")
+        time.sleep(0.02)
+
+
+def send_command(socket_path: Path, words: list[str]) -> None:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(str(socket_path))
+        sock.sendall((" ".join(words) + "\n").encode())
+        sock.makefile("r").readline()
+
+
+class Replay:
+    def __init__(self, env, daemon_socket, launcher):
+        self.env = env
+        self.daemon_socket = daemon_socket
+        self.launcher = launcher
+        self.latencies = {}
+        self.plugin_runs = 0
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def record(self, kind: str, fired: float) -> None:
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(time.monotonic() - fired)
+
+    def fire(self, entry: dict) -> None:
+        # like sketchybar and yabai, fire without waiting for earlier events
+        if entry["src"] == "bar":
+            kind = f"bar {entry['plugin']}"
+            target = self._run_plugin
+        else:
+            kind = f"yabai {entry['cmd'][0]}"
+            if entry["cmd"][0] == "event" and len(entry["cmd"]) > 1:
+                kind = f"yabai {entry['cmd'][1]}"
+            target = self._send
+        thread = threading.Thread(target=target, args=(kind, entry, time.monotonic()))
+        thread.start()
+        self.threads.append(thread)
+
+    def _run_plugin(self, kind: str, entry: dict, fired: float) -> None:
+        script = PLUGIN_DIR / f"{entry['plugin']}.py"
+        if not script.exists():
+            return
+        with self.lock:
+            self.plugin_runs += 1
+        subprocess.run(
+            self.launcher(script),
+            env=dict(self.env, **entry.get("env", {})),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.record(kind, fired)
+
+    def _send(self, kind: str, entry: dict, fired: float) -> None:
+        try:
+            send_command(self.daemon_socket, entry["cmd"])
+        except OSError:
+            return
+        self.record(kind, fired)
+
+    def wait(self) -> None:
+        for thread in self.threads:
+            thread.join()
+
+
+def settle(log: Path) -> float:
+    # returns when the last stub call happened, as a time.time() timestamp
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    last_size, last_change = -1, time.time()
+    while time.monotonic() < deadline:
+        size = log.stat().st_size if log.exists() else 0
+        if size != last_size:
+            last_size, last_change = size, time.time()
+        elif time.time() - last_change >= SETTLE:
+            break
+        time.sleep(0.05)
+    return log.stat().st_mtime if log.exists() else last_change
+
+
+def spawn_counts(log: Path) -> Counter:
+    try:
+        return Counter(line.split(" ", 1)[0] for line in log.read_text().splitlines())
+    except FileNotFoundError:
+        return Counter()
+
+
+def print_report(results):
+    print(f"{'event':<26}{'count':>6}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for kind, r in results["latency"].items():
+        print(
+            f"{kind:<26}{r['count']:>6}{r['p50'] * 1000:>9.1f}"
+            f"{r['p95'] * 1000:>9.1f}{r['max'] * 1000:>9.1f}"
+        )
+    print()
+    print(f"replayed {results['events']} events in {results['duration']:.2f}s")
+    print(f"settled {results['settle']:.2f}s after the last event")
+    spawns = ", ".join(f"{name} {n}" for name, n in results["spawns"].items())
+    print(f"spawned {results['plugin_runs']} plugins; stub calls: {spawns or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded event stream against stubs and a simulated yabai"
+    )
+    parser.add_argument(
+        "recording",
+        type=Path,
+        nargs="?",
+        default=Path.home() / ".cache" / "yabaduma" / "events.jsonl",
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="speed-up factor (default: real time)"
+    )
+    parser.add_argument(
+        "--forkserver",
+        action="store_true",
+        help="run plugins through the pre-warmed forkserver, as sketchybarrc does",
+    )
+    parser.add_argument("--displays", type=int, default=2)
+    parser.add_argument("--spaces", type=int, default=7)
+    parser.add_argument("--windows", type=int, default=30)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.002,
+        help="seconds every simulated yabai command takes",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    events = load_events(args.recording)
+    if not events:
+        sys.exit(f"no events in {args.recording}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        state = workdir / "state.json"
+        state.write_text(json.dumps(populate(args.displays, args.spaces, args.windows)))
+        log = workdir / "calls.log"
+        daemon_socket = workdir / "yabai-daemon.socket"
+        yabai_socket = workdir / "yabai.socket"
+        yabai_socket.touch()
+
+        bin_dir = make_stub_bin(workdir / "bin")
+        env = stub_env(bin_dir, log)
+        env.update(install(bin_dir, state))
+        env.update(
+            YABAI_SIM_LATENCY=str(args.latency),
+            # a home without the recording file, so the replay records nothing
+            HOME=str(workdir / "home"),
+            YABAI_SOCKET=str(yabai_socket),
+            YABAI_DAEMON_SOCKET=str(daemon_socket),
+            BAR_STATS_FILE=str(workdir / "stats.ring"),
+        )
+        env.pop("YABADUMA_RECORD_FILE", None)
+
+        servers = [subprocess.Popen([sys.executable, str(DAEMON)], env=env)]
+        wait_for_socket(servers[0], daemon_socket, "yabai daemon")
+        if args.forkserver:
+            forkserver_socket = workdir / "forkserver.socket"
+            env["BAR_FORKSERVER_SOCKET"] = str(forkserver_socket)
+            servers.append(subprocess.Popen([sys.executable, str(FORKSERVER)], env=env))
+            wait_for_socket(servers[1], forkserver_socket, "forkserver")
+
+            def launcher(script):
+                return [sys.executable, "-I", "-S", str(PLUGIN_CLIENT), script.stem]
+
+        else:
+
+            def launcher(script):
+                return [sys.executable, str(script)]
+
+        try:
+            replay = Replay(env, daemon_socket, launcher)
+            first = events[0]["t"]
+            started = time.monotonic()
+            for entry in events:
+                delay = started + (entry["t"] - first) / args.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                replay.fire(entry)
+            last_fired = time.time()
+            duration = time.monotonic() - started
+            replay.wait()
+            settled = settle(log)
+        finally:
+            for server in servers:
+                server.terminate()
+                server.wait()
+
+        spawns = spawn_counts(log)
+
+    results = {
+        "events": len(events),
+        "duration": duration,
+        "settle": max(0.0, settled - last_fired),
+        "plugin_runs": replay.plugin_runs,
+        "spawns": dict(spawns.most_common()),
+        "latency": {},
+    }
+    for kind, values in sorted(replay.latencies.items()):
+        values.sort()
+        results["latency"][kind] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": values[-1],
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
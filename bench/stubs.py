@@ -0,0 +1,88 @@
+import os
+import shlex
+from pathlib import Path
+
+# binary -> [(shell case pattern for "$*", canned stdout)]
+CANNED = {
+    "sketchybar": [],
+    "yabai": [
+        ("*--spaces\\ --space*", '{"index": 2, "display": 1, "has-focus": true}'),
+        (
+            "*--spaces*",
+            '[{"index": 1, "display": 1, "has-focus": false}, '
+            '{"index": 2, "display": 1, "has-focus": true}, '
+            '{"index": 3, "display": 2, "has-focus": false}]',
+        ),
+        ("*--windows\\ --window*", '{"id": 101, "app": "kitty", "has-focus": true}'),
+        ("*--windows*", '[{"id": 101, "app": "kitty", "title": "zsh"}]'),
+        ("*--displays*", '[{"index": 1, "frame": {"x": 0, "y": 0, "w": 1470, "h": 956}}]'),
+    ],
+    "pmset": [
+        (
+            "*",
+            "Now drawing from 'Battery Power'\n"
+            " -InternalBattery-0 (id=4390918)\t76%; discharging; 5:12 remaining present: true",
+        ),
+    ],
+    "blueutil": [
+        ("-p", "1"),
+        (
+            "--connected",
+            'address: 11-22-33-44-55-66, connected (master, -52 dBm), not favourite, '
+            'paired, name: "AirPods", recent access date: 2026-10-19 09:12:44 +0000',
+        ),
+    ],
+    "networksetup": [("*", "Wi-Fi Power (en0): On")],
+    "ipconfig": [
+        (
+            "*",
+            "<dictionary> {\n  InterfaceType : WiFi\n  BSSID : 12:34:56:78:9a:bc\n"
+            "  SSID : HomeNet\n}",
+        ),
+    ],
+    "osascript": [("*", "50")],
+}
+
+DEFAULT_DELAY = 0.01
+
+
+def stub_script(binary: str, delay: float) -> str:
+    lines = [
+        "#!/bin/sh",
+        f'echo "{binary} $*" >> "${{STUB_LOG:-/dev/null}}"',
+    ]
+    if delay > 0:
+        lines.append(f"sleep {delay}")
+    lines.append('case "$*" in')
+    for pattern, output in CANNED[binary]:
+        lines.append(f"  {pattern}) printf '%s\\n' {shlex.quote(output)} ;;")
+    lines.append("esac")
+    return "\n".join(lines) + "\n"
+
+
+def make_stub_bin(directory: Path, delays: "dict[str, float] | None" = None) -> Path:
+    delays = delays or {}
+    directory.mkdir(parents=True, exist_ok=True)
+    for binary in CANNED:
+        path = directory / binary
+        path.write_text(stub_script(binary, delays.get(binary, DEFAULT_DELAY)))
+        path.chmod(0o755)
+    return directory
+
+
+def stub_env(directory: Path, log: Path) -> dict[str, str]:
+    return dict(
+        os.environ,
+        PATH=f"{directory}{os.pathsep}{os.environ.get('PATH', '')}",
+        STUB_LOG=str(log),
+        # weather.py talks to wttr.in; keep benchmarks offline and repeatable
+        http_proxy="http://127.0.0.1:9",
+        https_proxy="http://127.0.0.1:9",
+    )
+
+
+def count_calls(log: Path) -> int:
+    try:
+        return len(log.read_text().splitlines())
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,674 @@
+"""A simulated yabai backed by a JSON state file, run as bench/fake-yabai."""
+
+import argparse
+import fcntl
+import json
+import os
+import sys
+import time
+
+# fake-yabai starts once per command, so this module avoids heavy imports
+FAKE_YABAI = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fake-yabai")
+
+DISPLAY_FRAMES = [
+    {"x": 0, "y": 0, "w": 1470, "h": 956},
+    {"x": 1470, "y": 0, "w": 2560, "h": 1440},
+    {"x": -1920, "y": 0, "w": 1920, "h": 1080},
+]
+APPS = ["kitty", "Safari", "Zed", "Slack", "Spotify", "Mail", "Notes", "Preview"]
+
+DEFAULT_CONFIG = {
+    "layout": "bsp",
+    "split_ratio": 0.5,
+    "top_padding": 10,
+    "bottom_padding": 10,
+    "left_padding": 10,
+    "right_padding": 10,
+    "window_gap": 10,
+}
+DIRECTIONS = {"west", "east", "north", "south"}
+EDGES = {
+    # edge -> (split that owns the edge, side of it the window must be on)
+    "left": ("vertical", "second"),
+    "right": ("vertical", "first"),
+    "top": ("horizontal", "second"),
+    "bottom": ("horizontal", "first"),
+}
+MIN_RATIO = 0.1
+
+
+class YabaiError(Exception):
+    pass
+
+
+def leaves(node: "dict | None") -> list[int]:
+    if node is None:
+        return []
+    if "window" in node:
+        return [node["window"]]
+    return leaves(node["first"]) + leaves(node["second"])
+
+
+def find_path(node: "dict | None", window_id: int) -> "list[tuple[dict, str]] | None":
+    # (split node, side) pairs from the root down to the window's leaf
+    if node is None:
+        return None
+    if "window" in node:
+        return [] if node["window"] == window_id else None
+    for side in ("first", "second"):
+        path = find_path(node[side], window_id)
+        if path is not None:
+            return [(node, side)] + path
+    return None
+
+
+def leaf(node: dict, path: list[tuple[dict, str]]) -> dict:
+    return path[-1][0][path[-1][1]] if path else node
+
+
+def replace(node: dict, new: dict) -> None:
+    node.clear()
+    node.update(new)
+
+
+class Sim:
+    def __init__(self, state: dict):
+        self.state = state
+        self.displays = state["displays"]
+        self.spaces = {s["index"]: s for s in state["spaces"]}
+        self.windows = {w["id"]: w for w in state["windows"]}
+        self.frames = {}
+        self.regions = {}
+        self.parents = {}
+        self.layout()
+
+    # -- geometry
+
+    def config(self, key: str, space: "dict | None" = None):
+        if space is not None and key in space["config"]:
+            return space["config"][key]
+        return self.state["config"].get(key, DEFAULT_CONFIG.get(key))
+
+    def display(self, index: int) -> dict:
+        return next(d for d in self.displays if d["index"] == index)
+
+    def layout(self) -> None:
+        self.frames = {
+            w["id"]: w["frame"] for w in self.windows.values() if w["floating"]
+        }
+        self.regions = {}
+        self.parents = {}
+        for space in self.spaces.values():
+            frame = self.display(space["display"])["frame"]
+            top = self.config("top_padding", space)
+            bottom = self.config("bottom_padding", space)
+            left = self.config("left_padding", space)
+            right = self.config("right_padding", space)
+            region = {
+                "x": frame["x"] + left,
+                "y": frame["y"] + top,
+                "w": frame["w"] - left - right,
+                "h": frame["h"] - top - bottom,
+            }
+            if space["tree"] is not None:
+                gap = self.config("window_gap", space)
+                self._layout_node(space["tree"], region, gap)
+
+    def _layout_node(self, node: dict, region: dict, gap: int) -> None:
+        self.regions[id(node)] = region
+        if "window" in node:
+            self.frames[node["window"]] = {k: round(v) for k, v in region.items()}
+            return
+        ratio = node["ratio"]
+        x, y, w, h = region["x"], region["y"], region["w"], region["h"]
+        if node["split"] == "vertical":
+            cut = w * ratio
+            first = {"x": x, "y": y, "w": cut - gap / 2, "h": h}
+            second = {"x": x + cut + gap / 2, "y": y, "w": w - cut - gap / 2, "h": h}
+        else:
+            cut = h * ratio
+            first = {"x": x, "y": y, "w": w, "h": cut - gap / 2}
+            second = {"x": x, "y": y + cut + gap / 2, "w": w, "h": h - cut - gap / 2}
+        for side, child in (("first", first), ("second", second)):
+            if "window" in node[side]:
+                self.parents[node[side]["window"]] = (node["split"], f"{side}_child")
+            self._layout_node(node[side], child, gap)
+
+    # -- selectors
+
+    def focused_display(self) -> dict:
+        return self.display(self.state["focused_display"])
+
+    def focused_space(self) -> dict:
+        return self.spaces[self.focused_display()["visible_space"]]
+
+    def focused_window(self) -> dict:
+        window = self.windows.get(self.state["focused_window"])
+        if window is None:
+            raise YabaiError("could not retrieve window details.")
+        return window
+
+    def is_visible(self, window: dict) -> bool:
+        display = self.display(self.spaces[window["space"]]["display"])
+        return (
+            display["visible_space"] == window["space"]
+            and not window["minimized"]
+            and not window["hidden"]
+        )
+
+    def tiled(self, window: dict) -> bool:
+        return not (window["floating"] or window["minimized"] or window["hidden"])
+
+    def select_window(self, selector: "str | None") -> dict:
+        if selector is None:
+            return self.focused_window()
+        if selector.isdigit():
+            window = self.windows.get(int(selector))
+            if window is None:
+                raise YabaiError(f"could not locate window with id '{selector}'.")
+            return window
+        if selector in DIRECTIONS:
+            found = self.neighbour(self.focused_window(), selector)
+            if found is None:
+                raise YabaiError(f"could not locate a {selector}ward managed window.")
+            return found
+        raise YabaiError(f"value '{selector}' is not a valid option for WINDOW_SEL")
+
+    def select_space(self, selector: "str | None") -> dict:
+        if selector is None:
+            return self.focused_space()
+        if selector.isdigit() and int(selector) in self.spaces:
+            return self.spaces[int(selector)]
+        raise YabaiError(f"could not locate space with index '{selector}'.")
+
+    def select_display(self, selector: "str | None") -> dict:
+        if selector is None:
+            return self.focused_display()
+        for display in self.displays:
+            if str(display["index"]) == selector:
+                return display
+        raise YabaiError(f"could not locate display with index '{selector}'.")
+
+    def neighbour(self, window: dict, direction: str) -> "dict | None":
+        f = self.frames.get(window["id"])
+        if f is None:
+            return None
+        best, best_gap = None, None
+        for other in self.windows.values():
+            if other is window or other["space"] != window["space"]:
+                continue
+            if not self.tiled(other):
+                continue
+            o = self.frames[other["id"]]
+            if direction in ("west", "east"):
+                aligned = f["y"] < o["y"] + o["h"] and o["y"] < f["y"] + f["h"]
+                if direction == "west":
+                    gap = f["x"] - (o["x"] + o["w"])
+                else:
+                    gap = o["x"] - (f["x"] + f["w"])
+            else:
+                aligned = f["x"] < o["x"] + o["w"] and o["x"] < f["x"] + f["w"]
+                if direction == "north":
+                    gap = f["y"] - (o["y"] + o["h"])
+                else:
+                    gap = o["y"] - (f["y"] + f["h"])
+            if aligned and gap >= -1 and (best_gap is None or gap < best_gap):
+                best, best_gap = other, gap
+        return best
+
+    # -- json views
+
+    def window_json(self, window: dict) -> dict:
+        space = self.spaces[window["space"]]
+        frame = self.frames.get(window["id"], window["frame"])
+        split_type, split_child = self.parents.get(window["id"], ("none", "none"))
+        return {
+            "id": window["id"],
+            "pid": window["pid"],
+            "app": window["app"],
+            "title": window["title"],
+            "frame": {k: float(v) for k, v in frame.items()},
+            "role": "AXWindow",
+            "subrole": "AXStandardWindow",
+            "display": space["display"],
+            "space": window["space"],
+            "level": 0,
+            "layer": "normal",
+            "opacity": 1.0,
+            "split-type": split_type,
+            "split-child": split_child,
+            "stack-index": 0,
+            "can-move": True,
+            "can-resize": True,
+            "has-focus": window["id"] == self.state["focused_window"],
+            "has-shadow": True,
+            "has-parent-zoom": False,
+            "has-fullscreen-zoom": False,
+            "is-native-fullscreen": False,
+            "is-visible": self.is_visible(window),
+            "is-minimized": window["minimized"],
+            "is-hidden": window["hidden"],
+            "is-floating": window["floating"],
+            "is-sticky": False,
+            "is-grabbed": False,
+        }
+
+    def space_json(self, space: dict) -> dict:
+        ids = [w["id"] for w in self.windows.values() if w["space"] == space["index"]]
+        tiled = leaves(space["tree"])
+        display = self.display(space["display"])
+        visible = display["visible_space"] == space["index"]
+        return {
+            "id": space["id"],
+            "uuid": "",
+            "index": space["index"],
+            "label": "",
+            "type": self.config("layout", space),
+            "display": space["display"],
+            "windows": ids,
+            "first-window": tiled[0] if tiled else 0,
+            "last-window": tiled[-1] if tiled else 0,
+            "has-focus": visible and display["index"] == self.state["focused_display"],
+            "is-visible": visible,
+            "is-native-fullscreen": False,
+        }
+
+    def display_json(self, display: dict) -> dict:
+        return {
+            "id": display["id"],
+            "uuid": display["uuid"],
+            "index": display["index"],
+            "label": "",
+            "frame": {k: float(v) for k, v in display["frame"].items()},
+            "spaces": [
+                s["index"]
+                for s in self.spaces.values()
+                if s["display"] == display["index"]
+            ],
+            "has-focus": display["index"] == self.state["focused_display"],
+        }
+
+    # -- commands
+
+    def query(self, args: list[str]):
+        if not args:
+            raise YabaiError("unknown command ''")
+        domain, rest = args[0], args[1:]
+        scope = rest[0] if rest and rest[0].startswith("--") else None
+        selector = rest[1] if len(rest) > 1 and not rest[1].startswith("--") else None
+
+        if domain == "--displays":
+            if scope == "--display":
+                return self.display_json(self.select_display(selector))
+            return [self.display_json(d) for d in self.displays]
+
+        if domain == "--spaces":
+            if scope == "--space":
+                return self.space_json(self.select_space(selector))
+            spaces = self.spaces.values()
+            if scope == "--display":
+                index = self.select_display(selector)["index"]
+                spaces = [s for s in spaces if s["display"] == index]
+            return [self.space_json(s) for s in spaces]
+
+        if domain == "--windows":
+            if scope == "--window":
+                return self.window_json(self.select_window(selector))
+            windows = self.windows.values()
+            if scope == "--space":
+                index = self.select_space(selector)["index"]
+                windows = [w for w in windows if w["space"] == index]
+            elif scope == "--display":
+                index = self.select_display(selector)["index"]
+                windows = [
+                    w for w in windows if self.spaces[w["space"]]["display"] == index
+                ]
+            return [self.window_json(w) for w in windows]
+
+        raise YabaiError(f"unknown command '{domain}'")
+
+    def focus(self, window: dict) -> None:
+        space = self.spaces[window["space"]]
+        self.display(space["display"])["visible_space"] = space["index"]
+        self.state["focused_display"] = space["display"]
+        self.state["focused_window"] = window["id"]
+
+    def insert(self, window: dict) -> None:
+        space = self.spaces[window["space"]]
+        new = {"window": window["id"]}
+        if space["tree"] is None:
+            space["tree"] = new
+            return
+        focused = self.windows.get(self.state["focused_window"])
+        path = None
+        if focused and focused["space"] == space["index"]:
+            path = find_path(space["tree"], focused["id"])
+        if path is None:
+            path = find_path(space["tree"], leaves(space["tree"])[-1])
+        node = leaf(space["tree"], path)
+        frame = self.frames.get(node["window"], {"w": 1, "h": 1})
+        replace(node, {
+            "split": "vertical" if frame["w"] >= frame["h"] else "horizontal",
+            "ratio": self.config("split_ratio", space),
+            "first": dict(node),
+            "second": new,
+        })
+
+    def leaf_of(self, window: dict) -> dict:
+        tree = self.spaces[window["space"]]["tree"]
+        return leaf(tree, find_path(tree, window["id"]))
+
+    def remove(self, window: dict) -> None:
+        space = self.spaces[window["space"]]
+        path = find_path(space["tree"], window["id"])
+        if path is None:
+            return
+        if not path:
+            space["tree"] = None
+            return
+        parent, side = path[-1]
+        replace(parent, parent["second" if side == "first" else "first"])
+
+    def swap(self, window: dict, selector: str) -> None:
+        if selector.isdigit():
+            other = self.select_window(selector)
+        else:
+            other = self.neighbour(window, selector)
+        if other is None or not self.tiled(window) or not self.tiled(other):
+            raise YabaiError(f"could not locate a {selector}ward managed window.")
+        a = self.leaf_of(window)
+        b = self.leaf_of(other)
+        a["window"], b["window"] = b["window"], a["window"]
+        window["space"], other["space"] = other["space"], window["space"]
+
+    def resize(self, window: dict, value: str) -> None:
+        try:
+            edge, dx, dy = value.split(":")
+            dx, dy = float(dx), float(dy)
+        except ValueError:
+            raise YabaiError(f"value '{value}' is not a valid option for RESIZE_HANDLE")
+        if edge not in EDGES:
+            raise YabaiError(f"value '{edge}' is not a valid option for RESIZE_HANDLE")
+        if window["floating"]:
+            f = window["frame"]
+            if edge == "left":
+                f["x"], f["w"] = f["x"] + dx, f["w"] - dx
+            elif edge == "right":
+                f["w"] += dx
+            elif edge == "top":
+                f["y"], f["h"] = f["y"] + dy, f["h"] - dy
+            else:
+                f["h"] += dy
+            return
+
+        split, side = EDGES[edge]
+        path = find_path(self.spaces[window["space"]]["tree"], window["id"]) or []
+        for node, node_side in reversed(path):
+            if node["split"] != split or node_side != side:
+                continue
+            region = self.regions[id(node)]
+            if split == "vertical":
+                fence = region["x"] + region["w"] * node["ratio"] + dx
+                ratio = (fence - region["x"]) / region["w"]
+            else:
+                fence = region["y"] + region["h"] * node["ratio"] + dy
+                ratio = (fence - region["y"]) / region["h"]
+            node["ratio"] = min(max(ratio, MIN_RATIO), 1 - MIN_RATIO)
+            return
+        raise YabaiError("cannot locate a bsp node fence.")
+
+    def toggle(self, window: dict, value: str) -> None:
+        if value == "split":
+            path = find_path(self.spaces[window["space"]]["tree"], window["id"])
+            if not path:
+                raise YabaiError("cannot toggle split of a root node.")
+            parent = path[-1][0]
+            flipped = "horizontal" if parent["split"] == "vertical" else "vertical"
+            parent["split"] = flipped
+        elif value == "float":
+            if window["floating"]:
+                window["floating"] = False
+                if not window["minimized"]:
+                    self.insert(window)
+            else:
+                window["frame"] = dict(self.frames[window["id"]])
+                self.remove(window)
+                window["floating"] = True
+        else:
+            raise YabaiError(f"value '{value}' is not a valid option for toggle")
+
+    def grid(self, window: dict, value: str) -> None:
+        try:
+            rows, cols, x, y, w, h = (int(v) for v in value.split(":"))
+        except ValueError:
+            raise YabaiError(f"value '{value}' is not a valid option for GRID")
+        if not window["floating"]:
+            return
+        frame = self.display(self.spaces[window["space"]]["display"])["frame"]
+        cell_w, cell_h = frame["w"] / cols, frame["h"] / rows
+        window["frame"] = {
+            "x": round(frame["x"] + x * cell_w),
+            "y": round(frame["y"] + y * cell_h),
+            "w": round(w * cell_w),
+            "h": round(h * cell_h),
+        }
+
+    def window(self, args: list[str]) -> None:
+        selector = None
+        if args and not args[0].startswith("--"):
+            selector, args = args[0], args[1:]
+        window = self.select_window(selector)
+        while args:
+            command, args = args[0], args[1:]
+            value = None
+            if command in ("--swap", "--resize", "--toggle", "--grid") or (
+                command == "--focus" and args and not args[0].startswith("--")
+            ):
+                if not args:
+                    raise YabaiError(f"missing value for '{command}'")
+                value, args = args[0], args[1:]
+
+            if command == "--focus":
+                target = self.select_window(value) if value else window
+                if target["minimized"]:
+                    raise YabaiError("cannot focus a minimized window.")
+                self.focus(target)
+            elif command == "--swap":
+                self.swap(window, value)
+            elif command == "--resize":
+                self.resize(window, value)
+            elif command == "--toggle":
+                self.toggle(window, value)
+            elif command == "--grid":
+                self.grid(window, value)
+            elif command == "--minimize":
+                if not window["minimized"]:
+                    self.remove(window)
+                    window["minimized"] = True
+            elif command == "--deminimize":
+                if window["minimized"]:
+                    window["minimized"] = False
+                    if not window["floating"]:
+                        self.insert(window)
+                    self.focus(window)
+            else:
+                raise YabaiError(f"unknown command '{command}'")
+            self.layout()
+
+    def config_command(self, args: list[str]) -> "str | None":
+        space = None
+        if args[:1] == ["--space"]:
+            if len(args) < 2:
+                raise YabaiError("missing value for '--space'")
+            space, args = self.select_space(args[1]), args[2:]
+        if not args:
+            raise YabaiError("missing config key")
+        key = args[0]
+        if len(args) == 1:
+            value = self.config(key, space)
+            return f"{value:g}" if isinstance(value, (int, float)) else str(value)
+
+        value = args[1]
+        try:
+            value = float(value) if "." in value else int(value)
+        except ValueError:
+            pass
+        (space["config"] if space else self.state["config"])[key] = value
+        self.layout()
+        return None
+
+
+def execute(sim: Sim, argv: list[str]):
+    if argv[:1] == ["--load-sa"]:
+        return None
+    if argv[:1] != ["-m"] or len(argv) < 2:
+        raise YabaiError("unknown option; use -m <domain> <command>")
+    domain, args = argv[1], argv[2:]
+    if domain == "query":
+        return json.dumps(sim.query(args))
+    if domain == "window":
+        sim.window(args)
+        return None
+    if domain == "config":
+        return sim.config_command(args)
+    if domain in ("signal", "rule", "space", "display"):
+        return None
+    raise YabaiError(f"unknown domain '{domain}'")
+
+
+def is_read_only(argv: list[str]) -> bool:
+    if argv[1:2] == ["query"]:
+        return True
+    if argv[1:2] != ["config"]:
+        return False
+    args = argv[2:]
+    if args[:1] == ["--space"]:
+        args = args[2:]
+    return len(args) <= 1
+
+
+def run(argv: list[str]) -> int:
+    log = os.environ.get("STUB_LOG")
+    if log:
+        with open(log, "a") as f:
+            f.write(" ".join(["yabai", *argv]) + "\n")
+    latency = float(os.environ.get("YABAI_SIM_LATENCY", "0"))
+    if latency > 0:
+        time.sleep(latency)
+
+    path = os.environ.get("YABAI_SIM_STATE")
+    if not path or not os.path.exists(path):
+        print("yabai-msg: failed to connect to socket..", file=sys.stderr)
+        return 1
+
+    read_only = is_read_only(argv)
+    with open(path, "r+") as f:
+        # concurrent callers (adjust_padding's thread pool) must not interleave
+        fcntl.flock(f, fcntl.LOCK_SH if read_only else fcntl.LOCK_EX)
+        state = json.loads(f.read())
+        try:
+            output = execute(Sim(state), argv)
+        except YabaiError as e:
+            print(e, file=sys.stderr)
+            return 1
+        if not read_only:
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+
+    if output is not None:
+        print(output)
+    return 0
+
+
+def populate(displays: int, spaces: int, windows: int, floating: int = 0) -> dict:
+    state = {
+        "config": dict(DEFAULT_CONFIG),
+        "displays": [],
+        "spaces": [],
+        "windows": [],
+        "focused_display": 1,
+        "focused_window": None,
+    }
+    per_display = -(-spaces // displays)
+    for index in range(1, displays + 1):
+        state["displays"].append({
+            "id": index,
+            "uuid": f"00000000-0000-0000-0000-{index:012d}",
+            "index": index,
+            "frame": dict(DISPLAY_FRAMES[(index - 1) % len(DISPLAY_FRAMES)]),
+            "visible_space": (index - 1) * per_display + 1,
+        })
+    for index in range(1, spaces + 1):
+        state["spaces"].append({
+            "id": 100 + index,
+            "index": index,
+            "display": min((index - 1) // per_display + 1, displays),
+            "tree": None,
+            "config": {},
+        })
+
+    sim = Sim(state)
+    for n in range(windows):
+        app = APPS[n % len(APPS)]
+        window = {
+            "id": 1000 + n,
+            "pid": 500 + n % len(APPS),
+            "app": app,
+            "title": f"{app} {n}",
+            "space": n % spaces + 1,
+            "floating": n < floating,
+            "minimized": False,
+            "hidden": False,
+            "frame": {"x": 100, "y": 100, "w": 800, "h": 600},
+        }
+        sim.windows[window["id"]] = window
+        state["windows"].append(window)
+        if not window["floating"]:
+            sim.insert(window)
+            sim.layout()
+        if state["focused_window"] is None and window["space"] == 1:
+            state["focused_window"] = window["id"]
+
+    scratchpad = {
+        "id": 1000 + windows,
+        "pid": 400,
+        "app": "kitty",
+        "title": "scratchpad",
+        "space": 1,
+        "floating": True,
+        "minimized": True,
+        "hidden": False,
+        "frame": {"x": 147, "y": 96, "w": 1176, "h": 669},
+    }
+    state["windows"].append(scratchpad)
+    return state
+
+
+def install(bin_dir: "os.PathLike", state: "os.PathLike") -> dict[str, str]:
+    """Put the fake yabai on bin_dir, replacing any stub, and return its env."""
+    target = os.path.join(bin_dir, "yabai")
+    if os.path.lexists(target):
+        os.unlink(target)
+    os.symlink(FAKE_YABAI, target)
+    return {"YABAI_SIM_STATE": str(state)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a simulated yabai layout")
+    parser.add_argument("state", help="state file to write")
+    parser.add_argument("--displays", type=int, default=2)
+    parser.add_argument("--spaces", type=int, default=7)
+    parser.add_argument("--windows", type=int, default=20)
+    parser.add_argument(
+        "--floating", type=int, default=0, help="how many windows float"
+    )
+    args = parser.parse_args()
+
+    state = populate(args.displays, args.spaces, args.windows, args.floating)
+    with open(args.state, "w") as f:
+        f.write(json.dumps(state))
+
+
+if __name__ == "__main__":
+    main()
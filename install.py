@@ -1,15 +1,44 @@
 #!/usr/bin/env python3
 
+import argparse
 import datetime
+import json
 import os
 import shutil
 import subprocess
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
 REPO_DIR = Path(__file__).parent.resolve()
 TIMESTAMP = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
 BACKUP_DIR = Path.home() / ".config" / f"yabaduma-backup-{TIMESTAMP}"
+# What the last run installed, linked and was told, so a re-run only fixes
+# what is wrong.
+MANIFEST = Path.home() / ".config" / "yabaduma" / "manifest.json"
+
+# package -> binary that proves it is installed without asking brew
+PACKAGE_BINARIES = {
+    "yabai": "yabai",
+    "skhd": "skhd",
+    "blueutil": "blueutil",
+    "jq": "jq",
+    "borders": "borders",
+    "sketchybar": "sketchybar",
+}
+FONT = "font-hack-nerd-font"
+
+# How long a restarted service gets to answer before the installer moves on,
+# and what counts as an answer.
+SERVICE_TIMEOUT = 10.0
+SERVICE_POLL_INTERVAL = 0.1
+READY_CHECKS = {
+    "yabai": ["yabai", "-m", "query", "--displays"],
+    "skhd": ["pgrep", "-x", "skhd"],
+    "borders": ["pgrep", "-x", "borders"],
+    "sketchybar": ["sketchybar", "--query", "bar"],
+}
 
 GREEN = "\033[0;32m"
 BLUE = "\033[0;34m"
@@ -37,45 +66,100 @@ def warn(msg):
     print(f"{YELLOW}[WARNING]{NC} {msg}")
 
 
-def run_cmd(cmd, shell=False):
-    result = subprocess.run(cmd, shell=shell, text=True)
+class InstallError(Exception):
+    pass
+
+
+def run_cmd(cmd, shell=False, env=None):
+    result = subprocess.run(cmd, shell=shell, text=True, env=env)
     return result.returncode == 0
 
 
-def run_cmd_or_exit(cmd, shell=False):
-    if not run_cmd(cmd, shell):
-        print(f"Error executing command: {cmd}")
-        sys.exit(1)
+def run_cmd_or_fail(cmd, shell=False, env=None):
+    if not run_cmd(cmd, shell, env):
+        raise InstallError(f"Error executing command: {cmd}")
+
+
+def load_manifest():
+    try:
+        return json.loads(MANIFEST.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, MANIFEST)
+
+
+def brew_inventory():
+    # One `brew list` covers formulae and casks; each call costs about a second.
+    result = subprocess.run(["brew", "list", "-1"], capture_output=True, text=True)
+    return set(result.stdout.split())
 
 
-def check_brew_package(package_name):
+def install_pywal():
     result = subprocess.run(
-        ["brew", "list", "--formula"], capture_output=True, text=True
+        [sys.executable, "-m", "pip", "install", "pywal"],
+        capture_output=True,
+        text=True,
     )
-    return package_name in result.stdout.split()
+    if result.returncode != 0:
+        print(result.stdout + result.stderr)
+        raise InstallError("Error: could not install pywal")
+    success("pywal installed.")
+    return True
 
 
-def check_cask(cask_name):
-    result = subprocess.run(["brew", "list", "--cask"], capture_output=True, text=True)
-    return cask_name in result.stdout.split()
+def install_brew_packages(packages, env=None):
+    inventory = brew_inventory()
+    missing = []
+    for pkg in packages:
+        pkg_name = pkg.split("/")[-1]
+        if pkg_name in inventory:
+            log(f"{pkg_name} is already installed.")
+        else:
+            missing.append(pkg)
+    if not missing:
+        return False
 
+    # brew fetches everything before pouring, so one call beats one per package
+    log(f"Installing {', '.join(pkg.split('/')[-1] for pkg in missing)}...")
+    run_cmd(["brew", "install", *missing], env=env)
+
+    inventory = brew_inventory()
+    failed = []
+    for pkg in missing:
+        pkg_name = pkg.split("/")[-1]
+        if pkg_name in inventory:
+            success(f"{pkg_name} installed.")
+        else:
+            warn(f"{pkg_name} failed to install.")
+            failed.append(pkg)
+    if failed:
+        raise InstallError(f"Error: could not install {', '.join(failed)}")
+    return True
+
+
+def install_homebrew():
+    warn("Homebrew not found. Installing...")
+    run_cmd_or_fail(
+        '/bin/bash -c "$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)"',
+        shell=True,
+    )
+    return True
 
-def install_dependencies(install_sketchybar=True, install_borders=True):
-    log("Checking prerequisites...")
-    if not shutil.which("brew"):
-        warn("Homebrew not found. Installing...")
-        run_cmd_or_exit(
-            '/bin/bash -c "$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)"',
-            shell=True,
-        )
-    else:
-        success("Homebrew is installed.")
 
+def tap_repositories(taps):
     log("Tapping repositories...")
-    run_cmd_or_exit(["brew", "tap", "koekeishiya/formulae"])
-    if install_sketchybar or install_borders:
-        run_cmd_or_exit(["brew", "tap", "FelixKratz/formulae"])
+    for tap in taps:
+        run_cmd_or_fail(["brew", "tap", tap])
+    return False
 
+
+def wanted_formulae(install_sketchybar=True, install_borders=True):
     packages = [
         "koekeishiya/formulae/yabai",
         "koekeishiya/formulae/skhd",
@@ -87,124 +171,374 @@ def install_dependencies(install_sketchybar=True, install_borders=True):
         packages.append("FelixKratz/formulae/borders")
     if install_sketchybar:
         packages.append("FelixKratz/formulae/sketchybar")
+    return packages
+
 
-    log("Installing dependencies...")
+def dependencies_present(packages, manifest):
+    # A package the last run installed still counts while its binary is on
+    # PATH; the font has no binary, so the manifest's word is taken for it.
+    installed = set(manifest.get("packages", []))
     for pkg in packages:
         pkg_name = pkg.split("/")[-1]
+        if pkg_name not in installed:
+            return False
+        binary = PACKAGE_BINARIES.get(pkg_name)
+        if binary and not shutil.which(binary):
+            return False
+    return shutil.which("wal") is not None
 
-        if check_brew_package(pkg_name):
-            log(f"{pkg_name} is already installed.")
-        else:
-            log(f"Installing {pkg}...")
-            run_cmd_or_exit(["brew", "install", pkg])
 
-    font = "font-hack-nerd-font"
-    if check_cask(font):
-        log(f"{font} is already installed.")
-    else:
-        log(f"Installing {font}...")
-        run_cmd_or_exit(["brew", "install", "--cask", font])
+def expand_path(path_str):
+    return Path(os.path.expanduser(path_str))
 
-    if not shutil.which("wal"):
-        log("Installing pywal...")
-        run_cmd_or_exit([sys.executable, "-m", "pip", "install", "pywal"])
-    else:
-        success("pywal is installed.")
 
+def backup(dest):
+    if not BACKUP_DIR.exists():
+        log(f"Backing up existing configs to {BACKUP_DIR}...")
+        BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(dest), str(BACKUP_DIR))
 
-def expand_path(path_str):
-    return Path(os.path.expanduser(path_str))
+
+def is_linked(src, dest):
+    return dest.is_symlink() and os.readlink(dest) == str(src)
 
 
 def backup_and_link(src, dest):
     src = Path(src)
     dest = expand_path(str(dest))
 
+    if is_linked(src, dest):
+        return False
+
     dest_dir = dest.parent
 
     if dest.exists() or dest.is_symlink():
-        shutil.move(str(dest), str(BACKUP_DIR))
+        backup(dest)
 
     dest_dir.mkdir(parents=True, exist_ok=True)
     os.symlink(src, dest)
     success(f"Linked {src} -> {dest}")
+    return True
 
 
-def setup_files(install_sketchybar=True, install_borders=True):
-    log(f"Backing up existing configs to {BACKUP_DIR}...")
-    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
-
-    backup_and_link(REPO_DIR / "yabairc", Path.home() / ".yabairc")
-    backup_and_link(REPO_DIR / "skhdrc", Path.home() / ".skhdrc")
+def wanted_links(install_sketchybar=True, install_borders=True):
+    local_bin = Path.home() / ".local" / "bin"
+    links = [
+        (REPO_DIR / "yabairc", Path.home() / ".yabairc"),
+        (REPO_DIR / "skhdrc", Path.home() / ".skhdrc"),
+    ]
 
     if install_borders:
-        backup_and_link(
-            REPO_DIR / "bordersrc", Path.home() / ".config" / "borders" / "bordersrc"
+        links.append(
+            (REPO_DIR / "bordersrc", Path.home() / ".config" / "borders" / "bordersrc")
         )
     if install_sketchybar:
-        backup_and_link(REPO_DIR / "sketchybar", Path.home() / ".config" / "sketchybar")
+        links.append((REPO_DIR / "sketchybar", Path.home() / ".config" / "sketchybar"))
 
-    backup_and_link(REPO_DIR / "scripts", Path.home() / ".config" / "skhd" / "scripts")
+    links.append((REPO_DIR / "scripts", Path.home() / ".config" / "skhd" / "scripts"))
+    links.append((REPO_DIR / "reload-theme.py", local_bin / "reload-theme"))
+
+    if install_sketchybar:
+        links.append((REPO_DIR / "sketchybar" / "bar-stats.py", local_bin / "bar-stats"))
+    return links
 
-    log("Setting up globally accessible scripts...")
-    local_bin = Path.home() / ".local" / "bin"
-    local_bin.mkdir(parents=True, exist_ok=True)
 
-    reload_theme_src = REPO_DIR / "reload-theme.py"
-    reload_theme_dest = local_bin / "reload-theme"
+def setup_files(manifest, install_sketchybar=True, install_borders=True):
+    links = wanted_links(install_sketchybar, install_borders)
+    changed = False
+    for src, dest in links:
+        changed |= backup_and_link(src, dest)
 
-    backup_and_link(reload_theme_src, reload_theme_dest)
+    # Links an earlier run made for a component that is no longer wanted.
+    wanted = {str(dest) for _, dest in links}
+    for dest, src in manifest.get("links", {}).items():
+        dest = Path(dest)
+        if str(dest) not in wanted and is_linked(src, dest):
+            dest.unlink()
+            log(f"Removed {dest}")
+            changed = True
+    manifest["links"] = {str(dest): str(src) for src, dest in links}
 
-    reload_theme_src.chmod(reload_theme_src.stat().st_mode | 0o111)
+    if not changed:
+        success("Configs are linked.")
 
+    for src, dest in links:
+        if dest.parent.name == "bin":
+            src.chmod(src.stat().st_mode | 0o111)
+
+    local_bin = Path.home() / ".local" / "bin"
     if str(local_bin) not in os.environ["PATH"]:
         warn(f"Ensure {local_bin} is in your PATH. Add this to your shell rc:")
         print(f'export PATH="{local_bin}:$PATH"')
+    return changed
 
 
-def start_services(install_sketchybar=True, install_borders=True):
-    log("Starting services...")
+def quiet(cmd):
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+def restart_service(service):
+    # -> (state, seconds from restart to ready or giving up)
+    start = time.monotonic()
+    if service in ("yabai", "skhd"):
+        quiet([service, "--stop-service"])
+        started = quiet([service, "--start-service"])
+    else:
+        started = quiet(["brew", "services", "restart", service])
+    if not started:
+        return "failed", time.monotonic() - start
+
+    deadline = start + SERVICE_TIMEOUT
+    while not quiet(READY_CHECKS[service]):
+        if time.monotonic() > deadline:
+            return "timeout", time.monotonic() - start
+        time.sleep(SERVICE_POLL_INTERVAL)
+    return "ready", time.monotonic() - start
 
-    for tool in ["yabai", "skhd"]:
-        log(f"Starting {tool}...")
-        run_cmd([tool, "--stop-service"])
-        if run_cmd([tool, "--start-service"]):
-            success(f"{tool} service started.")
-        else:
-            warn(
-                f"Failed to start {tool}. "
-                f"Run '{tool} --start-service' manually after granting Accessibility permissions."
-            )
 
-    brew_services = []
+def start_services(install_sketchybar=True, install_borders=True):
+    services = ["yabai", "skhd"]
     if install_borders:
-        brew_services.append("borders")
+        services.append("borders")
     if install_sketchybar:
-        brew_services.append("sketchybar")
-
-    for service in brew_services:
-        log(f"Starting {service}...")
-        if run_cmd(["brew", "services", "restart", service]):
-            success(f"{service} service started.")
+        services.append("sketchybar")
+
+    log(f"Restarting {', '.join(services)}...")
+    with ThreadPoolExecutor(max_workers=len(services)) as pool:
+        results = dict(zip(services, pool.map(restart_service, services)))
+
+    for service, (state, elapsed) in results.items():
+        if state == "ready":
+            success(f"{service} ready in {elapsed:.1f}s.")
+            continue
+        if state == "timeout":
+            warn(f"{service} started but wasn't ready after {SERVICE_TIMEOUT:.0f}s.")
+        elif service in ("yabai", "skhd"):
+            warn(
+                f"Failed to start {service}. "
+                f"Run '{service} --start-service' manually after granting Accessibility permissions."
+            )
         else:
             warn(
                 f"Failed to start {service}. Run 'brew services restart {service}' manually."
             )
 
+    # sketchybar's first run of space.py can beat yabai to its socket and
+    # draw no spaces, so ask for them again once both are up
+    ready = {service for service, (state, _) in results.items() if state == "ready"}
+    if {"yabai", "sketchybar"} <= ready:
+        quiet(["sketchybar", "--trigger", "spaces_changed"])
+
+    slowest = max(results, key=lambda service: results[service][1])
+    log(f"Services settled in {results[slowest][1]:.1f}s; slowest was {slowest}.")
+
+
+class Node:
+    def __init__(self, name, description, action, deps=()):
+        self.name = name
+        self.description = description
+        self.action = action
+        self.deps = list(deps)
+        self.state = "pending"
+        self.changed = False
+        self.error = None
+        self.elapsed = 0.0
+
+
+def build_plan(manifest, install_sketchybar=True, install_borders=True):
+    # Nodes are added after their dependencies, so the dict is already in a
+    # valid execution order; a dependency that isn't needed this run is
+    # simply left out.
+    nodes = {}
+
+    def add(name, description, action, deps=()):
+        nodes[name] = Node(name, description, action, [d for d in deps if d in nodes])
+
+    formulae = wanted_formulae(install_sketchybar, install_borders)
+    if not dependencies_present(formulae + [FONT], manifest):
+        if not shutil.which("brew"):
+            add("homebrew", "install Homebrew", install_homebrew)
+
+        taps = ["koekeishiya/formulae"]
+        if install_sketchybar or install_borders:
+            taps.append("FelixKratz/formulae")
+        add(
+            "taps",
+            f"brew tap {' '.join(taps)}",
+            lambda: tap_repositories(taps),
+            ["homebrew"],
+        )
+        add(
+            "formulae",
+            f"brew install {' '.join(pkg.split('/')[-1] for pkg in formulae)}",
+            lambda: install_brew_packages(formulae),
+            ["taps"],
+        )
+        # The cask is in Homebrew's own tap, so it downloads while the
+        # formulae install; only one of the two brew processes may update.
+        add(
+            "font",
+            f"brew install {FONT}",
+            lambda: install_brew_packages(
+                [FONT], env=dict(os.environ, HOMEBREW_NO_AUTO_UPDATE="1")
+            ),
+            ["homebrew"],
+        )
+        if not shutil.which("wal"):
+            add("pywal", "pip install pywal", install_pywal)
+
+    add(
+        "links",
+        "link configs into place",
+        lambda: setup_files(manifest, install_sketchybar, install_borders),
+    )
+
+    service_deps = ["formulae", "font", "links"]
+
+    def restart():
+        if not any(nodes[d].changed for d in service_deps if d in nodes):
+            log("Nothing changed; leaving the running services alone.")
+            return False
+        start_services(install_sketchybar, install_borders)
+        return True
+
+    add("services", "restart services", restart, service_deps)
+    return nodes
+
+
+def plan_stages(nodes):
+    stage = {}
+    for name, node in nodes.items():
+        stage[name] = 1 + max((stage[d] for d in node.deps), default=0)
+    stages = {}
+    for name, n in stage.items():
+        stages.setdefault(n, []).append(nodes[name])
+    return [stages[n] for n in sorted(stages)]
+
+
+def print_plan(nodes):
+    for n, stage in enumerate(plan_stages(nodes), 1):
+        print(f"Stage {n}:")
+        for node in stage:
+            after = f" (after {', '.join(node.deps)})" if node.deps else ""
+            print(f"  {node.name}: {node.description}{after}")
+
+
+def run_node(node):
+    start = time.monotonic()
+    try:
+        return node.action()
+    finally:
+        node.elapsed = time.monotonic() - start
+
+
+def run_plan(nodes):
+    # Starts every node whose dependencies are done as soon as they are. After
+    # a failure nothing new starts, but running nodes are left to finish:
+    # killing brew halfway is worse than waiting for it.
+    pending = dict(nodes)
+    running = {}
+    failed = None
+    with ThreadPoolExecutor(max_workers=len(nodes)) as pool:
+        while True:
+            if failed is None:
+                for name, node in list(pending.items()):
+                    if all(nodes[d].state == "done" for d in node.deps):
+                        del pending[name]
+                        node.state = "running"
+                        running[pool.submit(run_node, node)] = node
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                node = running.pop(future)
+                try:
+                    node.changed = future.result()
+                    node.state = "done"
+                except (InstallError, OSError) as e:
+                    node.state = "failed"
+                    node.error = str(e)
+                    failed = failed or node
+    return failed
+
+
+def print_report(nodes, failed):
+    print("")
+    print(f"Installation stopped: {failed.name} failed.")
+    print(f"  {failed.error}")
+    for node in nodes.values():
+        if node.state == "done":
+            status = f"done in {node.elapsed:.1f}s"
+        elif node.state == "failed":
+            status = f"FAILED after {node.elapsed:.1f}s"
+        else:
+            status = "not run"
+        print(f"  {node.name:<10} {status}")
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Install the Yabaduma config")
+    parser.add_argument(
+        "--reconfigure",
+        action="store_true",
+        help="ask the install questions again instead of reusing the last answers",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="show what would run, and in which stages, without doing it",
+    )
+    args = parser.parse_args()
+
     try:
         print("")
         print("=== Yabaduma Config Installer ===")
         print("")
 
-        install_sketchybar = ask("Install sketchybar (status bar)?", default=True)
-        install_borders = ask("Install borders (window borders)?", default=True)
-        print("")
+        manifest = load_manifest()
+        answers = manifest.get("answers")
+        if answers and not args.reconfigure:
+            log("Using the answers from the last install (--reconfigure to change).")
+        else:
+            answers = answers or {}
+            answers = {
+                "sketchybar": ask(
+                    "Install sketchybar (status bar)?",
+                    default=answers.get("sketchybar", True),
+                ),
+                "borders": ask(
+                    "Install borders (window borders)?",
+                    default=answers.get("borders", True),
+                ),
+            }
+            print("")
+        install_sketchybar = answers["sketchybar"]
+        install_borders = answers["borders"]
+
+        nodes = build_plan(manifest, install_sketchybar, install_borders)
+        if args.plan:
+            print_plan(nodes)
+            return
+
+        manifest["answers"] = answers
+        failed = run_plan(nodes)
+
+        brewed = [nodes[name] for name in ("formulae", "font") if name in nodes]
+        if brewed and all(node.state == "done" for node in brewed):
+            names = wanted_formulae(install_sketchybar, install_borders) + [FONT]
+            manifest["packages"] = sorted(
+                set(manifest.get("packages", []))
+                | {pkg.split("/")[-1] for pkg in names}
+            )
+        save_manifest(manifest)
 
-        install_dependencies(install_sketchybar, install_borders)
-        setup_files(install_sketchybar, install_borders)
-        start_services(install_sketchybar, install_borders)
+        if failed:
+            print_report(nodes, failed)
+            sys.exit(1)
 
         success("Installation complete!")
         print("")
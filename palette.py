@@ -0,0 +1,715 @@
+#!/usr/bin/env python3
+"""Palette and near-duplicate index over the wallpaper collection."""
+
+import argparse
+import json
+import math
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+REPO_DIR = Path(__file__).resolve().parent
+BACKGROUNDS = REPO_DIR / "backgrounds"
+INDEX_FILE = Path.home() / ".cache" / "yabaduma" / "palettes.idx"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".heic", ".tiff", ".bmp", ".webp"}
+# PNG color type -> samples per pixel
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+MAGIC = b"YBPI"
+INDEX_VERSION = 2
+# pixels sampled per image: plenty for a PALETTE_SIZE-color palette and a 9x8
+# hash, and what decode time and memory scale with
+PIXEL_BUDGET = 4096
+PALETTE_SIZE = 8
+KMEANS_ROUNDS = 10
+# hash rows compared at once by the numpy near-duplicate search
+HASH_BLOCK = 256
+
+
+class DecodeError(Exception):
+    pass
+
+
+def decode_bmp(data):
+    # the uncompressed 24/32-bit BMPs sips writes; rows are stored bottom-up
+    # unless the height is negative
+    offset, = struct.unpack_from("<I", data, 10)
+    width, height, _, bpp, compression = struct.unpack_from("<iiHHI", data, 18)
+    if bpp not in (24, 32) or compression not in (0, 3):
+        raise DecodeError(f"unsupported BMP ({bpp} bpp, compression {compression})")
+    shifts = (16, 8, 0)
+    if compression == 3:
+        masks = struct.unpack_from("<III", data, 54)
+        shifts = tuple((mask & -mask).bit_length() - 1 for mask in masks)
+
+    step = bpp // 8
+    stride = (width * step + 3) & ~3
+    rows = range(abs(height) - 1, -1, -1) if height > 0 else range(abs(height))
+    pixels = []
+    for row in rows:
+        start = offset + row * stride
+        for x in range(width):
+            value = int.from_bytes(data[start + x * step : start + x * step + step], "little")
+            pixels.append(tuple((value >> shift) & 0xFF for shift in shifts))
+    return pixels, width, abs(height)
+
+
+def sample_step(width, height, budget):
+    # keep every step-th pixel of every step-th row
+    return max(1, math.ceil(math.sqrt(width * height / budget)))
+
+
+def byte_add(a, b, low, high):
+    # bytewise a + b mod 256 across whole rows packed into ints: the low
+    # seven bits of every byte can't carry into the next byte, and the top
+    # bits are added without carry by the xor
+    return ((a & low) + (b & low)) ^ ((a ^ b) & high)
+
+
+def unfilter_paeth(raw, prior, bpp):
+    out = [(x + b) & 0xFF for x, b in zip(raw[:bpp], prior)]
+    append = out.append
+    for i, (x, b, c) in enumerate(zip(raw[bpp:], prior[bpp:], prior)):
+        a = out[i]
+        pa = b - c
+        pb = a - c
+        pc = pa + pb
+        if pa < 0:
+            pa = -pa
+        if pb < 0:
+            pb = -pb
+        if pc < 0:
+            pc = -pc
+        if pa <= pb and pa <= pc:
+            append((x + a) & 0xFF)
+        elif pb <= pc:
+            append((x + b) & 0xFF)
+        else:
+            append((x + c) & 0xFF)
+    return bytes(out)
+
+
+def unfilter_average(raw, prior, bpp):
+    out = [(x + (b >> 1)) & 0xFF for x, b in zip(raw[:bpp], prior)]
+    append = out.append
+    for i, (x, b) in enumerate(zip(raw[bpp:], prior[bpp:])):
+        append((x + ((out[i] + b) >> 1)) & 0xFF)
+    return bytes(out)
+
+
+def png_rows(f, stride, height):
+    # still filtered (filter type, bytes) rows, inflated one row ahead at most
+    inflate = zlib.decompressobj()
+    row = bytearray()
+    done = 0
+    while done < height:
+        head = f.read(8)
+        if len(head) < 8:
+            raise DecodeError("truncated PNG")
+        length, kind = struct.unpack(">I4s", head)
+        if kind != b"IDAT":
+            if kind == b"IEND":
+                raise DecodeError("PNG image data ends early")
+            f.seek(length + 4, os.SEEK_CUR)
+            continue
+        remaining = length
+        while remaining and done < height:
+            data = f.read(min(remaining, 1 << 16))
+            remaining -= len(data)
+            while (data or inflate.unconsumed_tail) and done < height:
+                row += inflate.decompress(data or inflate.unconsumed_tail, stride + 1 - len(row))
+                data = b""
+                if len(row) == stride + 1:
+                    yield row[0], bytes(row[1:])
+                    row.clear()
+                    done += 1
+        f.seek(remaining + 4, os.SEEK_CUR)
+
+
+def decode_png(path, budget):
+    # Every row is unfiltered since each can refer to the one above, but only
+    # two are held at a time and only the budget's grid of pixels is kept.
+    with open(path, "rb") as f:
+        if f.read(8) != b"\x89PNG\r\n\x1a\n":
+            raise DecodeError(f"{path.name} is not a PNG")
+        f.seek(8, os.SEEK_CUR)
+        width, height, depth, color_type, _, _, interlace = struct.unpack(
+            ">IIBBBBB", f.read(13)
+        )
+        f.seek(4, os.SEEK_CUR)
+        if interlace or color_type not in PNG_CHANNELS or depth not in (1, 2, 4, 8, 16):
+            raise DecodeError(f"unsupported PNG ({path.name})")
+
+        # PLTE, when there is one, comes before the image data
+        palette = None
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                raise DecodeError(f"{path.name} has no image data")
+            length, kind = struct.unpack(">I4s", head)
+            if kind == b"IDAT":
+                f.seek(-8, os.SEEK_CUR)
+                break
+            if kind == b"PLTE":
+                data = f.read(length)
+                palette = [tuple(data[i : i + 3]) for i in range(0, length, 3)]
+                f.seek(4, os.SEEK_CUR)
+            else:
+                f.seek(length + 4, os.SEEK_CUR)
+        if color_type == 3 and palette is None:
+            raise DecodeError(f"{path.name} has no palette")
+
+        channels = PNG_CHANNELS[color_type]
+        bpp = max(1, channels * depth // 8)
+        stride = (width * channels * depth + 7) // 8
+        low = int.from_bytes(b"\x7f" * stride, "big")
+        high = int.from_bytes(b"\x80" * stride, "big")
+        step = sample_step(width, height, budget)
+        columns = range(0, width, step)
+
+        pixels = []
+        prior = 0
+        for y, (kind, raw) in enumerate(png_rows(f, stride, height)):
+            if kind == 0:
+                current = int.from_bytes(raw, "big")
+            elif kind == 1:
+                current = int.from_bytes(raw, "big")
+                shift = bpp * 8
+                # prefix sums by doubling: log2(row) whole-row additions
+                while shift < stride * 8:
+                    current = byte_add(current, current >> shift, low, high)
+                    shift <<= 1
+            elif kind == 2:
+                current = byte_add(int.from_bytes(raw, "big"), prior, low, high)
+            elif kind in (3, 4):
+                unfilter = unfilter_average if kind == 3 else unfilter_paeth
+                current = int.from_bytes(
+                    unfilter(raw, prior.to_bytes(stride, "big"), bpp), "big"
+                )
+            else:
+                raise DecodeError(f"bad PNG filter {kind} in {path.name}")
+            if y % step == 0:
+                row = current.to_bytes(stride, "big")
+                pixels.extend(png_pixel(row, x, color_type, depth, palette) for x in columns)
+            prior = current
+    return pixels, len(columns), len(range(0, height, step))
+
+
+def png_pixel(row, x, color_type, depth, palette):
+    if depth < 8:
+        bit = x * depth
+        value = row[bit // 8] >> (8 - depth - bit % 8) & ((1 << depth) - 1)
+        if color_type == 3:
+            return palette[value]
+        value = value * 255 // ((1 << depth) - 1)
+        return (value, value, value)
+    size = depth // 8
+    start = x * PNG_CHANNELS[color_type] * size
+    # for 16-bit samples the high byte is plenty
+    samples = row[start : start + PNG_CHANNELS[color_type] * size : size]
+    if color_type == 3:
+        return palette[samples[0]]
+    if color_type in (0, 4):
+        return (samples[0],) * 3
+    return tuple(samples[:3])
+
+
+def pillow_reduce(image, budget):
+    step = sample_step(*image.size, budget)
+    size = (math.ceil(image.width / step), math.ceil(image.height / step))
+    # JPEGs decode straight at 1/2, 1/4 or 1/8 scale (DCT scaling)
+    image.draft("RGB", size)
+    image = image.convert("RGB")
+    factor = min(image.width // size[0], image.height // size[1])
+    if factor > 1:
+        image = image.reduce(factor)
+    return image.resize(size)
+
+
+def pillow_sample(path, budget):
+    try:
+        with Image.open(path) as image:
+            image = pillow_reduce(image, budget)
+            return list(image.getdata()), *image.size
+    except OSError as e:
+        raise DecodeError(str(e))
+
+
+def sips_sample(path, budget):
+    side = max(9, math.isqrt(budget))
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "sample.bmp"
+        subprocess.run(
+            ["sips", "-z", str(side), str(side), "-s", "format", "bmp",
+             str(path), "--out", str(out)],
+            check=True,
+            capture_output=True,
+        )
+        return decode_bmp(out.read_bytes())
+
+
+def scaled_copy(path, directory, budget):
+    # A copy of about `budget` pixels in `directory` for tools that would
+    # otherwise decode the full image, or None if it can't be made smaller.
+    path = Path(path)
+    out = Path(directory) / f"{path.stem}.png"
+    if Image is not None:
+        try:
+            with Image.open(path) as image:
+                if image.width * image.height <= budget:
+                    return None
+                pillow_reduce(image, budget).save(out)
+            return out
+        except OSError:
+            return None
+    # sips keeps the aspect ratio; a 16:9 image fits about `budget` this way
+    side = math.isqrt(budget * 16 // 9)
+    try:
+        subprocess.run(
+            ["sips", "-Z", str(side), "-s", "format", "png", str(path), "--out", str(out)],
+            check=True,
+            capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out
+
+
+def sample_pixels(path, budget=PIXEL_BUDGET):
+    # -> (row-major (r, g, b) tuples, columns, rows), about `budget` of them
+    if Image is not None:
+        return pillow_sample(path, budget)
+    try:
+        return sips_sample(path, budget)
+    except (OSError, subprocess.CalledProcessError) as e:
+        error = e
+    # the pure-Python PNG decoder is slow on big images, so it only runs
+    # where neither Pillow nor sips is around
+    if path.suffix.lower() == ".png":
+        try:
+            return decode_png(path, budget)
+        except zlib.error as e:
+            raise DecodeError(str(e))
+    raise DecodeError(f"can't decode {path.name} without Pillow or sips: {error}")
+
+
+def srgb_to_lab(rgb):
+    def linear(c):
+        c /= 255
+        return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+    r, g, b = (linear(c) for c in rgb)
+    # D65 white
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t):
+        return t ** (1 / 3) if t > 0.008856 else 7.787 * t + 16 / 116
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+def lab_to_hex(lab):
+    l, a, b = lab
+    fy = (l + 16) / 116
+    fx, fz = fy + a / 500, fy - b / 200
+
+    def finv(t):
+        return t ** 3 if t ** 3 > 0.008856 else (t - 16 / 116) / 7.787
+
+    x, y, z = finv(fx) * 0.95047, finv(fy), finv(fz) * 1.08883
+    rgb = (
+        3.2406 * x - 1.5372 * y - 0.4986 * z,
+        -0.9689 * x + 1.8758 * y + 0.0415 * z,
+        0.0557 * x - 0.2040 * y + 1.0570 * z,
+    )
+
+    def gamma(c):
+        c = 12.92 * c if c <= 0.0031308 else 1.055 * c ** (1 / 2.4) - 0.055
+        return max(0, min(255, round(c * 255)))
+
+    return "#" + "".join(f"{gamma(c):02x}" for c in rgb)
+
+
+def dist2(p, q):
+    return (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+
+
+def extract_palette(labs, k=PALETTE_SIZE):
+    # -> [(l, a, b, weight)] by falling weight; farthest-first seeds keep it
+    # deterministic and give a small accent color its own cluster
+    centers = [labs[len(labs) // 2]]
+    nearest = [dist2(p, centers[0]) for p in labs]
+    while len(centers) < k:
+        far = max(range(len(labs)), key=nearest.__getitem__)
+        if nearest[far] == 0:
+            break
+        centers.append(labs[far])
+        nearest = [min(d, dist2(p, labs[far])) for p, d in zip(labs, nearest)]
+
+    for _ in range(KMEANS_ROUNDS):
+        sums = [[0.0, 0.0, 0.0, 0] for _ in centers]
+        for p in labs:
+            best = min(range(len(centers)), key=lambda i: dist2(p, centers[i]))
+            s = sums[best]
+            s[0] += p[0]
+            s[1] += p[1]
+            s[2] += p[2]
+            s[3] += 1
+        moved = [
+            (s[0] / s[3], s[1] / s[3], s[2] / s[3]) if s[3] else c
+            for s, c in zip(sums, centers)
+        ]
+        if moved == centers:
+            break
+        centers = moved
+
+    palette = [(*c, s[3] / len(labs)) for c, s in zip(centers, sums) if s[3]]
+    palette.sort(key=lambda entry: -entry[3])
+    # pad short palettes (flat images) with zero-weight copies
+    while len(palette) < k:
+        palette.append((*palette[0][:3], 0.0))
+    return palette
+
+
+def difference_hash(pixels, width, height):
+    # 9x8 box-averaged luma; each bit says whether a cell is brighter than
+    # its right neighbour
+    luma = [0.299 * r + 0.587 * g + 0.114 * b for r, g, b in pixels]
+    cells = []
+    for cy in range(8):
+        y0 = cy * height // 8
+        y1 = max(y0 + 1, (cy + 1) * height // 8)
+        row = []
+        for cx in range(9):
+            x0 = cx * width // 9
+            x1 = max(x0 + 1, (cx + 1) * width // 9)
+            total = sum(luma[y * width + x] for y in range(y0, y1) for x in range(x0, x1))
+            row.append(total / ((y1 - y0) * (x1 - x0)))
+        cells.append(row)
+    bits = 0
+    for row in cells:
+        for left, right in zip(row, row[1:]):
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def analyze(path, budget=PIXEL_BUDGET):
+    # -> (palette, hash) for one image file
+    pixels, width, height = sample_pixels(path, budget)
+    labs = [srgb_to_lab(rgb) for rgb in pixels]
+    return extract_palette(labs), difference_hash(pixels, width, height)
+
+
+def image_files(directory):
+    return sorted(
+        p for p in directory.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+    )
+
+
+# Names plus two flat arrays: PALETTE_SIZE float32 (l, a, b, weight) rows per
+# image, and the 64-bit hashes.
+class Index:
+
+    def __init__(
+        self, directory, entries=None, palettes=None, hashes=None, budget=PIXEL_BUDGET
+    ):
+        self.directory = Path(directory)
+        self.budget = budget
+        # entries that failed to decode, so they aren't retried until they change
+        self.skipped = []
+        # [{"name", "mtime", "size"}], in the same order as the arrays
+        self.entries = entries or []
+        self.palettes = palettes if palettes is not None else array("f")
+        self.hashes = hashes if hashes is not None else array("Q")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def names(self):
+        return [entry["name"] for entry in self.entries]
+
+    def palette(self, i):
+        row = self.palettes[i * PALETTE_SIZE * 4 : (i + 1) * PALETTE_SIZE * 4]
+        return [tuple(row[j : j + 4]) for j in range(0, len(row), 4)]
+
+    def save(self, path=INDEX_FILE):
+        header = json.dumps(
+            {
+                "version": INDEX_VERSION,
+                "palette_size": PALETTE_SIZE,
+                "pixel_budget": self.budget,
+                "directory": str(self.directory),
+                "entries": self.entries,
+                "skipped": self.skipped,
+            }
+        ).encode()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            f.write(self.palettes.tobytes())
+            f.write(self.hashes.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        if data[:4] != MAGIC:
+            return None
+        length, = struct.unpack_from("<I", data, 4)
+        try:
+            header = json.loads(data[8 : 8 + length])
+        except ValueError:
+            return None
+        if (
+            header.get("version") != INDEX_VERSION
+            or header.get("palette_size") != PALETTE_SIZE
+        ):
+            return None
+        count = len(header["entries"])
+        start = 8 + length
+        palettes = array("f")
+        palettes.frombytes(data[start : start + count * PALETTE_SIZE * 16])
+        hashes = array("Q")
+        hashes.frombytes(data[start + count * PALETTE_SIZE * 16 :][: count * 8])
+        index = cls(
+            header["directory"],
+            header["entries"],
+            palettes,
+            hashes,
+            header.get("pixel_budget", PIXEL_BUDGET),
+        )
+        index.skipped = header.get("skipped", [])
+        return index
+
+
+def build_index(
+    directory=BACKGROUNDS, path=INDEX_FILE, workers=None, quiet=False, budget=PIXEL_BUDGET
+):
+    # only new or changed images are decoded, or all of them for a new budget
+    directory = Path(directory).resolve()
+    old = Index.load(path)
+    known = {}
+    skipped = []
+    if old is not None and Path(old.directory) == directory and old.budget == budget:
+        known = {entry["name"]: i for i, entry in enumerate(old.entries)}
+        skipped = old.skipped
+
+    index = Index(directory, budget=budget)
+    stale = []
+    for file in image_files(directory):
+        st = file.stat()
+        entry = {"name": file.name, "mtime": st.st_mtime, "size": st.st_size}
+        i = known.get(file.name)
+        if i is not None and old.entries[i] == entry:
+            index.entries.append(entry)
+            index.palettes.extend(array("f", [v for c in old.palette(i) for v in c]))
+            index.hashes.append(old.hashes[i])
+        elif entry in skipped:
+            index.skipped.append(entry)
+        else:
+            stale.append((file, entry))
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(
+                analyze_safely, [file for file, _ in stale], [budget] * len(stale)
+            )
+            for (file, entry), result in zip(stale, results):
+                if isinstance(result, str):
+                    print(f"Skipping {file.name}: {result}", file=sys.stderr)
+                    index.skipped.append(entry)
+                    continue
+                palette, dhash = result
+                index.entries.append(entry)
+                index.palettes.extend(array("f", [v for c in palette for v in c]))
+                index.hashes.append(dhash)
+                if not quiet:
+                    print(f"Indexed {file.name}")
+
+    if (
+        stale
+        or old is None
+        or old.budget != budget
+        or (old.entries, old.skipped) != (index.entries, index.skipped)
+    ):
+        index.save(path)
+    return index
+
+
+def analyze_safely(path, budget):
+    # worker side: an error message instead of an exception, so one broken
+    # image doesn't take the whole pool down
+    try:
+        return analyze(path, budget)
+    except DecodeError as e:
+        return str(e)
+
+
+def palette_distances(index, query):
+    # symmetric chamfer distance in Lab: each color matches its nearest
+    # counterpart on the other side, weighted by how much of its image it covers
+    n = len(index)
+    if np is not None:
+        pal = np.frombuffer(index.palettes, dtype=np.float32).reshape(n, PALETTE_SIZE, 4)
+        q = np.asarray(query, dtype=np.float32)
+        # (n, K, Kq) pairwise Lab distances
+        d = np.sqrt(((pal[:, :, None, :3] - q[None, None, :, :3]) ** 2).sum(-1))
+        forward = (d.min(axis=2) * pal[:, :, 3]).sum(1) / pal[:, :, 3].sum(1)
+        backward = (d.min(axis=1) * q[:, 3]).sum(1) / q[:, 3].sum()
+        return ((forward + backward) / 2).tolist()
+
+    q_weight = sum(c[3] for c in query)
+    distances = []
+    for i in range(n):
+        pal = index.palette(i)
+        d = [[math.sqrt(dist2(p, c)) for c in query] for p in pal]
+        forward = sum(min(row) * p[3] for row, p in zip(d, pal)) / sum(p[3] for p in pal)
+        backward = sum(
+            min(d[j][k] for j in range(len(pal))) * c[3] for k, c in enumerate(query)
+        ) / q_weight
+        distances.append((forward + backward) / 2)
+    return distances
+
+
+def hamming_pairs(index, max_distance):
+    # -> (i, j, distance) for hashes at most max_distance bits apart
+    n = len(index)
+    pairs = []
+    if np is not None:
+        hashes = np.frombuffer(index.hashes, dtype=np.uint64)
+        popcount = np.array([bin(b).count("1") for b in range(256)], dtype=np.uint8)
+        # a block of rows at a time keeps memory at HASH_BLOCK * n * 8 bytes
+        for start in range(0, n, HASH_BLOCK):
+            block = hashes[start : start + HASH_BLOCK]
+            xor = (block[:, None] ^ hashes[None, :]).view(np.uint8)
+            d = popcount[xor].reshape(len(block), n, 8).sum(2, dtype=np.uint8)
+            i, j = np.nonzero(d <= max_distance)
+            pairs += [
+                (int(a) + start, int(b), int(d[a, b]))
+                for a, b in zip(i, j)
+                if b > a + start
+            ]
+        return pairs
+
+    for i in range(n):
+        for j in range(i + 1, n):
+            bits = bin(index.hashes[i] ^ index.hashes[j]).count("1")
+            if bits <= max_distance:
+                pairs.append((i, j, bits))
+    return pairs
+
+
+def wal_palette():
+    # pywal's 16 colors count as an evenly weighted palette
+    colors_file = Path.home() / ".cache" / "wal" / "colors.json"
+    wal = json.loads(colors_file.read_text())
+    hexes = list(dict.fromkeys(wal["colors"].values()))
+    return [(*srgb_to_lab(hex_to_rgb(h)), 1 / len(hexes)) for h in hexes]
+
+
+def hex_to_rgb(hex_color):
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i : i + 2], 16) for i in (0, 2, 4))
+
+
+def query_palette(index, target):
+    # target is an indexed name, an image file or comma-separated hex colors
+    if target in index.names():
+        return index.palette(index.names().index(target))
+    if Path(target).is_file():
+        return analyze(Path(target), index.budget)[0]
+    try:
+        hexes = [h.strip() for h in target.split(",")]
+        return [(*srgb_to_lab(hex_to_rgb(h)), 1 / len(hexes)) for h in hexes]
+    except ValueError:
+        raise DecodeError(f"{target} is not an indexed image, a file or hex colors")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find wallpapers by palette, and near-duplicate wallpapers"
+    )
+    parser.add_argument(
+        "--dir", type=Path, default=BACKGROUNDS, help="wallpaper directory"
+    )
+    parser.add_argument(
+        "--pixel-budget",
+        type=int,
+        default=PIXEL_BUDGET,
+        help=f"pixels sampled per image (default: {PIXEL_BUDGET})",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("index", help="update the index")
+
+    similar = sub.add_parser("similar", help="wallpapers with a close palette")
+    similar.add_argument(
+        "target",
+        nargs="?",
+        help="wallpaper name, image file or #hex,#hex,...; default: pywal's colors",
+    )
+    similar.add_argument("-n", type=int, default=5)
+
+    dupes = sub.add_parser("dupes", help="near-duplicate images")
+    dupes.add_argument(
+        "--max-distance", type=int, default=8, help="differing hash bits out of 64"
+    )
+
+    palette = sub.add_parser("palette", help="print an image's palette")
+    palette.add_argument("target")
+
+    args = parser.parse_args()
+
+    index = build_index(
+        args.dir, quiet=args.command != "index", budget=max(81, args.pixel_budget)
+    )
+    if args.command == "index":
+        print(f"{len(index)} wallpapers indexed in {INDEX_FILE}")
+        return
+
+    try:
+        if args.command == "similar":
+            query = query_palette(index, args.target) if args.target else wal_palette()
+            distances = palette_distances(index, query)
+            ranked = sorted(zip(distances, index.names()))
+            skip = args.target if args.target in index.names() else None
+            ranked = [(d, name) for d, name in ranked if name != skip]
+            for d, name in ranked[: args.n]:
+                print(f"{d:7.2f}  {name}")
+        elif args.command == "dupes":
+            names = index.names()
+            for i, j, bits in sorted(hamming_pairs(index, args.max_distance), key=lambda p: p[2]):
+                print(f"{bits:3d}  {names[i]}  {names[j]}")
+        elif args.command == "palette":
+            for l, a, b, weight in query_palette(index, args.target):
+                print(f"{lab_to_hex((l, a, b))}  {weight * 100:5.1f}%")
+    except (DecodeError, OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
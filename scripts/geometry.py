@@ -0,0 +1,108 @@
+import json
+import os
+import socket
+import subprocess
+
+# Tiled neighbours are separated by window_gap; anything within this many
+# points of an edge counts as touching it.
+EDGE_TOLERANCE = 24
+
+DAEMON_SOCKET = os.environ.get(
+    "YABAI_DAEMON_SOCKET", f"/tmp/yabai-daemon_{os.environ.get('USER', '')}.socket"
+)
+# The daemon turns this off for itself so it never queries its own socket.
+USE_DAEMON = True
+
+
+def daemon_query(*words: str):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.5)
+            sock.connect(DAEMON_SOCKET)
+            sock.sendall((" ".join(("query",) + words) + "\n").encode())
+            reply = sock.makefile("r").readline()
+    except OSError:
+        return None
+    try:
+        return json.loads(reply)
+    except json.JSONDecodeError:
+        return None
+
+
+def query_space_windows() -> "list[dict] | None":
+    if USE_DAEMON:
+        windows = daemon_query("windows")
+        if windows is not None:
+            return windows
+
+    result = subprocess.run(
+        ["yabai", "-m", "query", "--windows", "--space"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return None
+
+
+def is_tiled(window: dict) -> bool:
+    return (
+        not window.get("is-floating", False)
+        and not window.get("is-minimized", False)
+        and not window.get("is-hidden", False)
+        and window.get("is-visible", True)
+    )
+
+
+def focused_window(windows: list[dict]) -> "dict | None":
+    return next((w for w in windows if w.get("has-focus")), None)
+
+
+def _overlap(start1, length1, start2, length2) -> bool:
+    return (
+        start1 < start2 + length2 - EDGE_TOLERANCE
+        and start2 < start1 + length1 - EDGE_TOLERANCE
+    )
+
+
+def neighbour(window: dict, windows: list[dict], direction: str) -> "dict | None":
+    f = window["frame"]
+    candidates = []
+    for other in windows:
+        if other["id"] == window["id"] or not is_tiled(other):
+            continue
+        o = other["frame"]
+        if direction == "west":
+            gap = f["x"] - (o["x"] + o["w"])
+            aligned = _overlap(f["y"], f["h"], o["y"], o["h"])
+        elif direction == "east":
+            gap = o["x"] - (f["x"] + f["w"])
+            aligned = _overlap(f["y"], f["h"], o["y"], o["h"])
+        elif direction == "north":
+            gap = f["y"] - (o["y"] + o["h"])
+            aligned = _overlap(f["x"], f["w"], o["x"], o["w"])
+        else:
+            gap = o["y"] - (f["y"] + f["h"])
+            aligned = _overlap(f["x"], f["w"], o["x"], o["w"])
+        if aligned and gap >= -EDGE_TOLERANCE:
+            candidates.append((gap, other))
+    if not candidates:
+        return None
+    return min(candidates, key=lambda c: c[0])[1]
+
+
+def toggled_split_neighbour(window: dict, direction: str) -> bool:
+    # Whether toggling the parent split would put the sibling in `direction`:
+    # after a toggle the first child sits left/top and the second right/bottom.
+    split = window.get("split-type")
+    child = window.get("split-child")
+    if direction in ("west", "east") and split != "horizontal":
+        return False
+    if direction in ("north", "south") and split != "vertical":
+        return False
+    if direction in ("west", "north"):
+        return child == "second_child"
+    return child == "first_child"
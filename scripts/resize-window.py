@@ -4,15 +4,19 @@ import shutil
 import subprocess
 import sys
 
+from geometry import focused_window, is_tiled, neighbour, query_space_windows
+
 RESIZE_AMOUNT = 50
 
 RESIZE_MAP = {
-    "left": (f"left:-{RESIZE_AMOUNT}:0", f"right:-{RESIZE_AMOUNT}:0"),
-    "right": (f"right:{RESIZE_AMOUNT}:0", f"left:{RESIZE_AMOUNT}:0"),
-    "up": (f"top:0:-{RESIZE_AMOUNT}", f"bottom:0:-{RESIZE_AMOUNT}"),
-    "down": (f"bottom:0:{RESIZE_AMOUNT}", f"top:0:{RESIZE_AMOUNT}"),
+    "left": ("left:-{0}:0", "right:-{0}:0"),
+    "right": ("right:{0}:0", "left:{0}:0"),
+    "up": ("top:0:-{0}", "bottom:0:-{0}"),
+    "down": ("bottom:0:{0}", "top:0:{0}"),
 }
 
+EDGE_DIRECTIONS = {"left": "west", "right": "east", "top": "north", "bottom": "south"}
+
 
 def check_yabai() -> bool:
     if not shutil.which("yabai"):
@@ -38,6 +42,41 @@ def resize_window(resize_arg: str) -> bool:
     return result.returncode == 0
 
 
+def plan_resize(direction: str, windows: list[dict]) -> "str | None":
+    window = focused_window(windows)
+    if window is None:
+        return None
+
+    primary, fallback = RESIZE_MAP[direction]
+    if not is_tiled(window):
+        return primary
+
+    # A tiled window can only move an edge that it shares with a neighbour.
+    for candidate in (primary, fallback):
+        edge = candidate.split(":", 1)[0]
+        if neighbour(window, windows, EDGE_DIRECTIONS[edge]):
+            return candidate
+    return None
+
+
+def resize(
+    direction: str,
+    amount: int = RESIZE_AMOUNT,
+    windows: "list[dict] | None" = None,
+) -> None:
+    if windows is None:
+        windows = query_space_windows()
+    if windows is None:
+        primary, fallback = RESIZE_MAP[direction]
+        if not resize_window(primary.format(amount)):
+            resize_window(fallback.format(amount))
+        return
+
+    resize_arg = plan_resize(direction, windows)
+    if resize_arg:
+        resize_window(resize_arg.format(amount))
+
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: resize-window.py <left|right|up|down>", file=sys.stderr)
@@ -52,9 +91,7 @@ def main():
     if not check_yabai():
         sys.exit(1)
 
-    primary, fallback = RESIZE_MAP[direction]
-    if not resize_window(primary):
-        resize_window(fallback)
+    resize(direction)
 
 
 if __name__ == "__main__":
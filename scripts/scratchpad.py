@@ -1,10 +1,24 @@
 #!/usr/bin/env python3
 
-import subprocess
+import argparse
 import json
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
 
 SCRATCHPAD_TITLE = "scratchpad"
-TERMINAL_CMD = ["kitty", "--title", SCRATCHPAD_TITLE, "--single-instance", "--instance-group", SCRATCHPAD_TITLE]
+# the same pattern as the yabairc rule, so a file or tab that merely starts
+# with "scratchpad-" is never taken over
+TITLE_PATTERN = re.compile(r"scratchpad(-[A-Za-z0-9_]+)?")
+GRID = "10:10:1:1:8:7"
+
+# scratchpad title -> window id, checked with a single-window query before use
+INDEX_FILE = Path.home() / ".cache" / "yabaduma" / "scratchpads.json"
+
+PRESPAWN_TIMEOUT = 10.0
+PRESPAWN_INTERVAL = 0.2
 
 
 def run(cmd):
@@ -16,44 +30,126 @@ def run_yabai(args):
     return run(["yabai", "-m"] + args)
 
 
-def get_scratchpad_window():
+def scratchpad_title(name=None):
+    return f"{SCRATCHPAD_TITLE}-{name}" if name else SCRATCHPAD_TITLE
+
+
+def terminal_cmd(title):
+    return ["kitty", "--title", title, "--single-instance", "--instance-group", title]
+
+
+def load_index():
+    try:
+        return json.loads(INDEX_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(index):
+    INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = INDEX_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(index))
+    os.replace(tmp, INDEX_FILE)
+
+
+def query_window(window_id):
+    window_json = run_yabai(["query", "--windows", "--window", str(window_id)])
+    if not window_json:
+        return None
+    try:
+        window = json.loads(window_json)
+    except json.JSONDecodeError:
+        return None
+    return window if TITLE_PATTERN.fullmatch(window.get("title", "")) else None
+
+
+def scan_scratchpads():
     windows_json = run_yabai(["query", "--windows"])
     if not windows_json:
-        return None
+        return {}
     windows = json.loads(windows_json)
-    for window in windows:
-        if window.get("title") == SCRATCHPAD_TITLE:
+    return {
+        window["title"]: window
+        for window in windows
+        if TITLE_PATTERN.fullmatch(window.get("title", ""))
+    }
+
+
+def get_scratchpad_window(title=SCRATCHPAD_TITLE):
+    index = load_index()
+    if title in index:
+        window = query_window(index[title])
+        if window and window.get("title") == title:
             return window
-    return None
+
+    # The cached id is gone or now belongs to another window, so rebuild the
+    # index for every scratchpad from one full query.
+    scratchpads = scan_scratchpads()
+    save_index({t: w["id"] for t, w in scratchpads.items()})
+    return scratchpads.get(title)
 
 
-def create_scratchpad():
-    subprocess.Popen(TERMINAL_CMD, start_new_session=True)
+def create_scratchpad(title):
+    subprocess.Popen(terminal_cmd(title), start_new_session=True)
 
 
-def show_scratchpad(window_id):
-    run_yabai(["window", str(window_id), "--focus"])
-    window = get_scratchpad_window()
-    if window and not window.get("is-floating"):
-        run_yabai(["window", str(window_id), "--toggle", "float"])
-    run_yabai(["window", str(window_id), "--grid", "10:10:1:1:8:7"])
+def show_scratchpad(window):
+    window_id = str(window["id"])
+    run_yabai(["window", window_id, "--focus"])
+    if not window.get("is-floating"):
+        run_yabai(["window", window_id, "--toggle", "float"])
+    run_yabai(["window", window_id, "--grid", GRID])
 
 
 def minimize_window(window_id):
     run_yabai(["window", str(window_id), "--minimize"])
 
 
-def main():
-    window = get_scratchpad_window()
+def prespawn(title):
+    # Start the terminal minimized ahead of time so the first toggle only has
+    # to deminimize it instead of waiting for kitty to start cold.
+    if get_scratchpad_window(title) is not None:
+        return
+    create_scratchpad(title)
+    deadline = time.monotonic() + PRESPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(PRESPAWN_INTERVAL)
+        window = get_scratchpad_window(title)
+        if window is not None:
+            minimize_window(window["id"])
+            return
+
+
+def toggle(title):
+    window = get_scratchpad_window(title)
     if window is None:
-        create_scratchpad()
+        create_scratchpad(title)
     elif window.get("is-minimized", False):
         run_yabai(["window", str(window["id"]), "--deminimize"])
-        show_scratchpad(window["id"])
+        show_scratchpad(window)
     elif window.get("has-focus", False):
         minimize_window(window["id"])
     else:
-        show_scratchpad(window["id"])
+        show_scratchpad(window)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Toggle a floating kitty scratchpad")
+    parser.add_argument("name", nargs="?", help="named scratchpad (default: the main one)")
+    parser.add_argument(
+        "--prespawn",
+        action="store_true",
+        help="start the scratchpad minimized if it is not running yet",
+    )
+    args = parser.parse_args()
+
+    title = scratchpad_title(args.name)
+    if not TITLE_PATTERN.fullmatch(title):
+        parser.error("scratchpad names may only use letters, digits and _")
+    if args.prespawn:
+        prespawn(title)
+    else:
+        toggle(title)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,14 @@ import shutil
 import subprocess
 import sys
 
+from geometry import (
+    focused_window,
+    is_tiled,
+    neighbour,
+    query_space_windows,
+    toggled_split_neighbour,
+)
+
 VALID_DIRECTIONS = {"west", "east", "north", "south"}
 
 
@@ -35,6 +43,35 @@ def toggle_split() -> None:
     subprocess.run(["yabai", "-m", "window", "--toggle", "split"], capture_output=True)
 
 
+def plan_swap(direction: str, windows: list[dict]) -> list[list[str]]:
+    window = focused_window(windows)
+    if window is None or not is_tiled(window):
+        return []
+    if neighbour(window, windows, direction):
+        return [["--swap", direction]]
+    if window.get("split-type") not in ("horizontal", "vertical"):
+        return []
+
+    # Same outcome as swap, toggle split, swap again, minus the failed swaps.
+    plan = [["--toggle", "split"]]
+    if toggled_split_neighbour(window, direction):
+        plan.append(["--swap", direction])
+    return plan
+
+
+def smart_swap(direction: str, windows: "list[dict] | None" = None) -> None:
+    if windows is None:
+        windows = query_space_windows()
+    if windows is None:
+        if not swap_window(direction):
+            toggle_split()
+            swap_window(direction)
+        return
+
+    for args in plan_swap(direction, windows):
+        subprocess.run(["yabai", "-m", "window", *args], capture_output=True)
+
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: smart-swap.py <west|east|north|south>", file=sys.stderr)
@@ -49,9 +86,7 @@ def main():
     if not check_yabai():
         sys.exit(1)
 
-    if not swap_window(direction):
-        toggle_split()
-        swap_window(direction)
+    smart_swap(direction)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+import json
+import subprocess
+
+from geometry import is_tiled
+
+# Windows further apart than this along a cut still count as touching it.
+CUT_TOLERANCE = 24
+
+WINDOW_EVENTS = {
+    "window_created",
+    "window_destroyed",
+    "window_moved",
+    "window_resized",
+    "window_focused",
+    "window_minimized",
+    "window_deminimized",
+}
+REBUILD_EVENTS = {
+    "space_created",
+    "space_destroyed",
+    "display_added",
+    "display_removed",
+    "display_moved",
+    "display_changed",
+    "mission_control_exit",
+}
+APPLICATION_EVENTS = {
+    "application_hidden",
+    "application_visible",
+    "application_terminated",
+}
+
+
+def yabai_query(*args: str):
+    result = subprocess.run(
+        ["yabai", "-m", "query", *args], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return None
+
+
+def _cut(windows: list[dict], axis: str, size: str):
+    for edge in sorted({w["frame"][axis] + w["frame"][size] for w in windows}):
+        first = [w for w in windows if w["frame"][axis] + w["frame"][size] <= edge]
+        second = [w for w in windows if w["frame"][axis] + w["frame"][size] > edge]
+        if first and second and all(
+            w["frame"][axis] >= edge - CUT_TOLERANCE for w in second
+        ):
+            return first, second
+    return None
+
+
+def build_tree(windows: list[dict]) -> "dict | None":
+    # yabai only exposes leaves, so recover the BSP tree by repeatedly finding a
+    # straight cut that separates the tiled windows into two groups.
+    if not windows:
+        return None
+    if len(windows) == 1:
+        return {"window": windows[0]["id"]}
+
+    for split, axis, size in (("vertical", "x", "w"), ("horizontal", "y", "h")):
+        halves = _cut(windows, axis, size)
+        if halves:
+            return {
+                "split": split,
+                "first": build_tree(halves[0]),
+                "second": build_tree(halves[1]),
+            }
+    return {"stack": [w["id"] for w in windows]}
+
+
+class SpaceModel:
+    def __init__(self, query=yabai_query):
+        self.query = query
+        self.spaces = {}
+        self.space_index = {}
+        self.window_space = {}
+        self.focused_space = None
+        self.stale = True
+
+    def rebuild(self) -> bool:
+        spaces = self.query("--spaces")
+        windows = self.query("--windows")
+        if spaces is None or windows is None:
+            return False
+
+        self.spaces = {
+            s["index"]: {
+                "id": s["id"],
+                "display": s["display"],
+                "windows": {},
+                "dirty": False,
+            }
+            for s in spaces
+        }
+        self.space_index = {s["id"]: s["index"] for s in spaces}
+        self.focused_space = next(
+            (s["index"] for s in spaces if s.get("has-focus")), None
+        )
+        self.window_space = {}
+        for window in windows:
+            self._store(window)
+        self.stale = False
+        return True
+
+    def _store(self, window: dict) -> None:
+        space = self.spaces.get(window.get("space"))
+        if space is None:
+            self.stale = True
+            return
+        previous = self.window_space.get(window["id"])
+        if previous is not None and previous != window["space"]:
+            self.spaces[previous]["windows"].pop(window["id"], None)
+        space["windows"][window["id"]] = window
+        self.window_space[window["id"]] = window["space"]
+
+    def _forget(self, window_id: int) -> "int | None":
+        index = self.window_space.pop(window_id, None)
+        if index is not None and index in self.spaces:
+            self.spaces[index]["windows"].pop(window_id, None)
+        return index
+
+    def mark_dirty(self, index: "int | None") -> None:
+        if index in self.spaces:
+            self.spaces[index]["dirty"] = True
+        else:
+            self.stale = True
+
+    def _ensure(self, index: "int | None") -> "int | None":
+        if self.stale and not self.rebuild():
+            return None
+        if index is None:
+            index = self.focused_space
+        space = self.spaces.get(index)
+        if space is None:
+            return None
+        if space["dirty"]:
+            windows = self.query("--windows", "--space", str(index))
+            if windows is None:
+                return None
+            for window_id in list(space["windows"]):
+                self._forget(window_id)
+            for window in windows:
+                self._store(window)
+            space["dirty"] = False
+        return index
+
+    def handle_event(
+        self, event: str, arg: str = "", window: "dict | None" = None
+    ) -> None:
+        if self.stale:
+            return
+        if event in REBUILD_EVENTS:
+            self.stale = True
+            return
+
+        if event == "space_changed":
+            index = self.space_index.get(int(arg)) if arg.isdigit() else None
+            if index is None:
+                self.stale = True
+            else:
+                self.focused_space = index
+            return
+
+        if event in APPLICATION_EVENTS:
+            pid = int(arg) if arg.isdigit() else None
+            for space in self.spaces.values():
+                if any(w.get("pid") == pid for w in space["windows"].values()):
+                    space["dirty"] = True
+            return
+
+        if event not in WINDOW_EVENTS or not arg.isdigit():
+            return
+        window_id = int(arg)
+
+        if event == "window_destroyed":
+            self.mark_dirty(self._forget(window_id))
+            return
+
+        if window is not None:
+            self._store(window)
+            self.mark_dirty(window.get("space"))
+        elif window_id not in self.window_space:
+            window = self.query("--windows", "--window", arg)
+            if window is None:
+                return
+            self._store(window)
+            self.mark_dirty(window.get("space"))
+        elif (
+            event in ("window_focused", "window_moved")
+            and self.window_space[window_id] != self.focused_space
+        ):
+            # focus or a move landing off the focused space usually means the
+            # window was sent elsewhere, so ask yabai where it is now
+            self.mark_dirty(self.window_space[window_id])
+            window = self.query("--windows", "--window", arg)
+            if window is None:
+                self.mark_dirty(self.focused_space)
+            else:
+                self._store(window)
+                self.mark_dirty(window.get("space"))
+        elif event != "window_focused":
+            self.mark_dirty(self.window_space[window_id])
+
+        if event == "window_focused":
+            for space in self.spaces.values():
+                for window in space["windows"].values():
+                    window["has-focus"] = window["id"] == window_id
+
+    def windows(self, index: "int | None" = None) -> "list[dict] | None":
+        index = self._ensure(index)
+        if index is None:
+            return None
+        return list(self.spaces[index]["windows"].values())
+
+    def focused_window(self) -> "dict | None":
+        windows = self.windows()
+        if windows is not None:
+            window = next((w for w in windows if w.get("has-focus")), None)
+            if window is not None:
+                return window
+        # the model missed a focus change; yabai's focused window is one query
+        window = self.query("--windows", "--window")
+        if window is not None and not self.stale:
+            self._store(window)
+            self.mark_dirty(window.get("space"))
+        return window
+
+    def tree(self, index: "int | None" = None) -> "dict | None":
+        index = self._ensure(index)
+        if index is None:
+            return None
+        windows = self.spaces[index]["windows"].values()
+        return {
+            "space": index,
+            "display": self.spaces[index]["display"],
+            "tree": build_tree([w for w in windows if is_tiled(w)]),
+            "floating": [w["id"] for w in windows if w.get("is-floating")],
+            "minimized": [w["id"] for w in windows if w.get("is-minimized")],
+        }
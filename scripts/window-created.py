@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from geometry import is_tiled
+
+# A brand-new window can be missing from yabai's queries, or not tiled yet,
+# for a moment; retry only then instead of always sleeping before the query.
+RETRY_DELAYS = (0.02, 0.05, 0.1)
+
+
+def query(*args: str):
+    result = subprocess.run(
+        ["yabai", "-m", "query", *args], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return None
+
+
+def query_window(window_id: str) -> "dict | None":
+    return query("--windows", "--window", window_id)
+
+
+def is_ready(window: "dict | None") -> bool:
+    # until yabai tiles a new window it reports no split, or split-type "none"
+    if window is None or "split-type" not in window:
+        return False
+    if window["split-type"] != "none" or window.get("is-floating", False):
+        return True
+    # "none" is final for a window alone on its space or on a stack or float
+    # space, so only a bsp space with other tiled windows means not yet
+    space = query("--spaces", "--space", str(window.get("space", "")))
+    if space is None or space.get("type") != "bsp":
+        return True
+    if len(space.get("windows", [])) <= 1:
+        return True
+    windows = query("--windows", "--space", str(window["space"]))
+    return windows is None or sum(1 for w in windows if is_tiled(w)) <= 1
+
+
+def wait_for_window(window_id: str) -> "dict | None":
+    window = query_window(window_id)
+    for delay in (*RETRY_DELAYS, None):
+        if is_ready(window):
+            return window
+        if delay is None:
+            return None
+        time.sleep(delay)
+        window = query_window(window_id)
+
+
+def place(window_id: str, window: dict) -> None:
+    split = window["split-type"]
+    if split == "vertical" and window.get("split-child") == "second_child":
+        subprocess.run(
+            ["yabai", "-m", "window", window_id, "--toggle", "split"],
+            capture_output=True,
+        )
+
+
+def handle(window_id: str) -> "dict | None":
+    window = wait_for_window(window_id)
+    if window is not None:
+        place(window_id, window)
+    return window
+
+
+def main():
+    if len(sys.argv) > 1:
+        window_id = sys.argv[1]
+    else:
+        window_id = os.environ.get("YABAI_WINDOW_ID", "")
+    if not window_id.isdigit():
+        print("Usage: window-created.py <window id>", file=sys.stderr)
+        sys.exit(1)
+
+    handle(window_id)
+
+
+if __name__ == "__main__":
+    main()
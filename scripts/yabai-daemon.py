@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+
+import fcntl
+import heapq
+import importlib.util
+import itertools
+import json
+import os
+import selectors
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import geometry  # noqa: E402
+from space_model import SpaceModel  # noqa: E402
+
+SOCKET_PATH = geometry.DAEMON_SOCKET
+# Held under flock for the daemon's whole life: only the holder binds the
+# socket, and yabairc kills the daemon through it whatever path it runs from.
+PID_FILE = os.path.splitext(SOCKET_PATH)[0] + ".pid"
+# how long a new daemon waits for one that is being killed to let go
+LOCK_TIMEOUT = 2.0
+YABAI_SOCKET = os.environ.get(
+    "YABAI_SOCKET", f"/tmp/yabai_{os.environ.get('USER', '')}.socket"
+)
+# Shared with the sketchybar plugins; commands are recorded while it exists.
+RECORD_FILE = Path(
+    os.environ.get(
+        "YABADUMA_RECORD_FILE", Path.home() / ".cache" / "yabaduma" / "events.jsonl"
+    )
+)
+geometry.USE_DAEMON = False
+
+# Resize presses closer together than this are key repeats of one hold and are
+# merged into a single resize once the key has been quiet for this long.
+COALESCE_WINDOW = 0.15
+# A held key still resizes at least this often instead of only on release.
+COALESCE_MAX_WAIT = 0.25
+
+# event -> (handler, seconds the events must be quiet before it runs). A
+# handler queued by several events of one burst runs once, after the last,
+# and gets every (event, arg) of the burst.
+DEBOUNCED_HANDLERS = {
+    "display_added": (("displays", 0.2),),
+    "display_removed": (("displays", 0.2),),
+    "display_changed": (("displays", 0.2),),
+    "space_created": (("bar_spaces", 0.1),),
+    "space_destroyed": (("bar_spaces", 0.1),),
+    "dock_did_restart": (("load_sa", 0.5),),
+}
+
+
+def load_script(name: str, directory: Path = SCRIPT_DIR):
+    spec = importlib.util.spec_from_file_location(
+        name.replace("-", "_"), directory / f"{name}.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+smart_swap = load_script("smart-swap")
+resize_window = load_script("resize-window")
+window_created = load_script("window-created")
+adjust_padding = load_script("adjust_padding", SCRIPT_DIR.parent)
+
+# direction -> (axis, sign); opposite presses on an axis cancel out
+RESIZE_AXES = {
+    "left": ("x", -1),
+    "right": ("x", 1),
+    "up": ("y", -1),
+    "down": ("y", 1),
+}
+
+yabai_installed = shutil.which("yabai") is not None
+
+
+def yabai_alive() -> bool:
+    # yabai owns this socket while it runs; a stat is far cheaper than a query
+    return yabai_installed and os.path.exists(YABAI_SOCKET)
+
+
+class ResizeCoalescer:
+    def __init__(self, model: "SpaceModel | None" = None):
+        self.model = model
+        self.steps = {"x": 0, "y": 0}
+        self.first = None
+        self.last = None
+
+    def add(self, direction: str) -> None:
+        axis, sign = RESIZE_AXES[direction]
+        self.steps[axis] += sign
+        self.last = time.monotonic()
+        if self.first is None:
+            self.first = self.last
+
+    def timeout(self) -> "float | None":
+        if self.last is None:
+            return None
+        due = min(self.last + COALESCE_WINDOW, self.first + COALESCE_MAX_WAIT)
+        return max(0.0, due - time.monotonic())
+
+    def released(self) -> bool:
+        return self.last is not None and time.monotonic() >= self.last + COALESCE_WINDOW
+
+    def flush(self) -> None:
+        steps, self.steps = self.steps, {"x": 0, "y": 0}
+        self.first = self.last = None
+        for axis, negative, positive in (("x", "left", "right"), ("y", "up", "down")):
+            count = steps[axis]
+            if count:
+                direction = positive if count > 0 else negative
+                amount = abs(count) * resize_window.RESIZE_AMOUNT
+                resize_window.resize(direction, amount, current_windows(self.model))
+                touched(self.model)
+
+
+def current_windows(model: "SpaceModel | None") -> "list[dict] | None":
+    # None makes swap and resize query yabai themselves, which beats acting
+    # on a model that lost track of the focused window
+    if model is None:
+        return None
+    windows = model.windows()
+    if windows is None or geometry.focused_window(windows) is None:
+        model.mark_dirty(model.focused_space)
+        return None
+    return windows
+
+
+def touched(model: "SpaceModel | None") -> None:
+    if model:
+        model.mark_dirty(model.focused_space)
+
+
+def query(model: "SpaceModel | None", words: list[str]) -> str:
+    if model is None:
+        return "error: the layout model needs a running daemon"
+    index = int(words[1]) if len(words) > 1 and words[1].isdigit() else None
+    if words[0] == "windows":
+        result = model.windows(index)
+    elif words[0] == "tree":
+        result = model.tree(index)
+    elif words[0] == "focused":
+        result = model.focused_window()
+    else:
+        return f"error: unknown query: {words[0]}"
+    return json.dumps(result)
+
+
+def display_ids(events: list[tuple[str, str]], event: str) -> set[int]:
+    return {int(arg) for name, arg in events if name == event and arg.isdigit()}
+
+
+def update_displays(
+    events: list[tuple[str, str]],
+    dispatcher: "Dispatcher",
+    deadline: "float | None" = None,
+) -> None:
+    if deadline is None:
+        deadline = time.monotonic() + adjust_padding.READY_TIMEOUT
+    elif dispatcher.defer("displays", events):
+        # a newer burst is queued and will cover these displays too
+        return
+
+    added = display_ids(events, "display_added")
+    removed = display_ids(events, "display_removed")
+    # a display plugged and pulled within one burst has no settled state
+    displays, spaces = adjust_padding.layout()
+    ready = adjust_padding.displays_ready(
+        displays, spaces, added - removed, removed - added
+    )
+    if not ready and time.monotonic() < deadline:
+        # yabai hasn't caught up with the hotplug; look again from the event
+        # loop so hotkeys keep being served meanwhile
+        dispatcher.call_later(
+            adjust_padding.READY_INTERVAL, update_displays, events, dispatcher, deadline
+        )
+        return
+
+    # everything after this sees the settled display set
+    adjust_padding.apply(displays, spaces, dispatcher.paddings)
+    if any(name != "display_changed" for name, _ in events):
+        update_bar_spaces(events, dispatcher)
+
+
+def update_bar_spaces(
+    _events: list[tuple[str, str]], _dispatcher: "Dispatcher"
+) -> None:
+    # sketchybar's space controller diffs its items against yabai's spaces
+    if shutil.which("sketchybar"):
+        subprocess.run(["sketchybar", "--trigger", "spaces_changed"])
+
+
+def load_scripting_addition(
+    _events: list[tuple[str, str]], _dispatcher: "Dispatcher"
+) -> None:
+    subprocess.run(["sudo", "yabai", "--load-sa"])
+
+
+HANDLERS = {
+    "displays": update_displays,
+    "bar_spaces": update_bar_spaces,
+    "load_sa": load_scripting_addition,
+}
+
+
+class Dispatcher:
+    def __init__(self, model: "SpaceModel | None" = None):
+        self.model = model
+        self.due = {}
+        self.events = {}
+        # space id -> top padding last applied, so a hotplug only writes
+        # the spaces that change
+        self.paddings = {}
+        # (time, tiebreak, function, args) for call_later, soonest first
+        self.timers = []
+        self.sequence = itertools.count()
+
+    def dispatch(self, event: str, arg: str) -> None:
+        window = None
+        if event == "window_created" and arg.isdigit():
+            window = self.new_window(arg)
+        if self.model:
+            self.model.handle_event(event, arg, window)
+
+        now = time.monotonic()
+        for handler, quiet in DEBOUNCED_HANDLERS.get(event, ()):
+            self.due[handler] = max(self.due.get(handler, now), now + quiet)
+            self.events.setdefault(handler, []).append((event, arg))
+
+    def new_window(self, window_id: str, attempt: int = 0) -> "dict | None":
+        # a brand-new window may not be tiled yet; retry from the event loop
+        # instead of sleeping in it. Returns the window as last queried, ready
+        # or not, for the model.
+        window = window_created.query_window(window_id)
+        if window_created.is_ready(window):
+            window_created.place(window_id, window)
+        elif attempt < len(window_created.RETRY_DELAYS):
+            self.call_later(
+                window_created.RETRY_DELAYS[attempt],
+                self.retry_new_window,
+                window_id,
+                attempt + 1,
+            )
+        return window
+
+    def retry_new_window(self, window_id: str, attempt: int) -> None:
+        window = self.new_window(window_id, attempt)
+        if window is not None and self.model:
+            self.model.handle_event("window_created", window_id, window)
+
+    def call_later(self, delay: float, function, *args) -> None:
+        heapq.heappush(
+            self.timers, (time.monotonic() + delay, next(self.sequence), function, args)
+        )
+
+    def defer(self, handler: str, events: list[tuple[str, str]]) -> bool:
+        # hand events to a queued run of handler, if there is one
+        if handler not in self.due:
+            return False
+        self.events[handler] = events + self.events[handler]
+        return True
+
+    def timeout(self) -> "float | None":
+        due = list(self.due.values()) + [t[0] for t in self.timers[:1]]
+        if not due:
+            return None
+        return max(0.0, min(due) - time.monotonic())
+
+    def run_due(self) -> None:
+        now = time.monotonic()
+        while self.timers and self.timers[0][0] <= now:
+            _, _, function, args = heapq.heappop(self.timers)
+            self.run(function.__name__, function, *args)
+        for handler in [h for h, t in self.due.items() if t <= now]:
+            del self.due[handler]
+            events = self.events.pop(handler)
+            self.run(handler, HANDLERS[handler], events, self)
+
+    def run(self, name: str, function, *args) -> None:
+        try:
+            function(*args)
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            print(f"{name} failed: {e}", file=sys.stderr)
+
+
+def check_command(words: list[str]) -> str:
+    if len(words) != 2 or words[0] not in ("swap", "resize"):
+        return f"error: unknown command: {' '.join(words)}"
+
+    valid = smart_swap.VALID_DIRECTIONS if words[0] == "swap" else RESIZE_AXES
+    if words[1] not in valid:
+        return f"error: invalid direction: {words[1]}"
+    if not yabai_alive():
+        return "error: yabai is not running"
+    return ""
+
+
+def execute(
+    words: list[str],
+    coalescer: "ResizeCoalescer | None" = None,
+    dispatcher: "Dispatcher | None" = None,
+) -> str:
+    model = dispatcher.model if dispatcher else None
+    if words == ["ping"]:
+        return "ok"
+    if words[:1] == ["event"] and len(words) >= 2:
+        if dispatcher is not None:
+            dispatcher.dispatch(words[1], words[2] if len(words) > 2 else "")
+        return "ok"
+    if words[:1] == ["query"] and len(words) >= 2:
+        return query(model, words[1:])
+
+    error = check_command(words)
+    if error:
+        return error
+
+    action, direction = words
+    if action == "resize":
+        if coalescer is None:
+            resize_window.resize(direction, windows=current_windows(model))
+            touched(model)
+        else:
+            coalescer.add(direction)
+        return "ok"
+
+    if coalescer is not None and coalescer.last is not None:
+        coalescer.flush()
+    smart_swap.smart_swap(direction, current_windows(model))
+    touched(model)
+    return "ok"
+
+
+def record_command(words: list[str]) -> None:
+    if not words or words[0] in ("ping", "query"):
+        return
+    try:
+        fd = os.open(RECORD_FILE, os.O_WRONLY | os.O_APPEND)
+    except OSError:
+        return
+    entry = {"t": time.time(), "src": "yabai", "cmd": words}
+    try:
+        os.write(fd, (json.dumps(entry) + "\n").encode())
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_command(conn: socket.socket) -> list[str]:
+    conn.settimeout(1.0)
+    words = conn.makefile("r").readline().split()
+    record_command(words)
+    return words
+
+
+def reply(conn: socket.socket, message: str) -> None:
+    try:
+        conn.sendall(f"{message}\n".encode())
+    except OSError:
+        pass
+
+
+def handle_connection(
+    server: socket.socket, coalescer: ResizeCoalescer, dispatcher: Dispatcher
+) -> None:
+    conn, _ = server.accept()
+    with conn:
+        try:
+            words = read_command(conn)
+        except OSError:
+            return
+        reply(conn, execute(words, coalescer, dispatcher))
+
+
+def drop_stale_repeats(
+    server: socket.socket, coalescer: ResizeCoalescer, dispatcher: Dispatcher
+) -> None:
+    # Repeats that queued up while the merged resize ran belong to the hold
+    # that just ended, so answer them without resizing again.
+    while True:
+        try:
+            conn, _ = server.accept()
+        except BlockingIOError:
+            return
+        with conn:
+            try:
+                words = read_command(conn)
+            except OSError:
+                continue
+            if words and words[0] == "resize":
+                reply(conn, "dropped")
+            else:
+                reply(conn, execute(words, coalescer, dispatcher))
+
+
+def lock_pid_file() -> "int | None":
+    fd = os.open(PID_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                return None
+            time.sleep(0.05)
+    os.ftruncate(fd, 0)
+    os.write(fd, f"{os.getpid()}\n".encode())
+    return fd
+
+
+def serve():
+    # another daemon is running; the lock stays held until this one exits
+    if lock_pid_file() is None:
+        return
+
+    try:
+        os.unlink(SOCKET_PATH)
+    except FileNotFoundError:
+        pass
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(SOCKET_PATH)
+    os.chmod(SOCKET_PATH, 0o600)
+    server.listen(64)
+    server.setblocking(False)
+
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    model = SpaceModel()
+    coalescer = ResizeCoalescer(model)
+    dispatcher = Dispatcher(model)
+
+    while True:
+        timeouts = [
+            t for t in (coalescer.timeout(), dispatcher.timeout()) if t is not None
+        ]
+        if selector.select(min(timeouts, default=None)):
+            try:
+                handle_connection(server, coalescer, dispatcher)
+            except BlockingIOError:
+                pass
+        if coalescer.last is not None and coalescer.timeout() == 0:
+            released = coalescer.released()
+            coalescer.flush()
+            # only a finished hold leaves repeats behind; mid-hold they are
+            # the next batch
+            if released:
+                drop_stale_repeats(server, coalescer, dispatcher)
+        dispatcher.run_due()
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--once":
+        dispatcher = Dispatcher()
+        record_command(sys.argv[2:])
+        message = execute(sys.argv[2:], dispatcher=dispatcher)
+        while dispatcher.timeout() is not None:
+            time.sleep(dispatcher.timeout())
+            dispatcher.run_due()
+        if message != "ok":
+            print(message, file=sys.stderr)
+            sys.exit(1)
+        return
+
+    serve()
+
+
+if __name__ == "__main__":
+    main()
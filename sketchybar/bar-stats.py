@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "plugins"))
+
+from bar import read_runs, stats_file  # noqa: E402
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def item_of(name: str) -> str:
+    # older recordings have one space.N item per space, all running space.py
+    return name.split(".", 1)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency stats for sketchybar plugins")
+    parser.add_argument("items", nargs="*", help="only show these items")
+    parser.add_argument(
+        "--since", type=float, metavar="MINUTES", help="only count recent runs"
+    )
+    parser.add_argument("--file", type=Path, default=stats_file())
+    args = parser.parse_args()
+
+    now = time.time()
+    runs = read_runs(args.file)
+    if args.since is not None:
+        runs = [r for r in runs if r[1] >= now - args.since * 60]
+    if not runs:
+        print(f"No runs recorded in {args.file}")
+        return
+
+    by_item: dict[str, list[tuple[str, float, float, int, int]]] = {}
+    for r in runs:
+        by_item.setdefault(item_of(r[0]), []).append(r)
+
+    span_hours = max((now - min(r[1] for r in runs)) / 3600, 1 / 60)
+
+    print(
+        f"{'item':<14}{'runs':>7}{'runs/h':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'fail':>6}{'procs':>7}"
+    )
+    for item in sorted(by_item):
+        if args.items and item not in args.items:
+            continue
+        item_runs = by_item[item]
+        latencies = sorted((end - start) * 1000 for _, start, end, _, _ in item_runs)
+        failures = sum(1 for r in item_runs if r[3] != 0)
+        children = sum(r[4] for r in item_runs) / len(item_runs)
+        print(
+            f"{item:<14}{len(item_runs):>7}{len(item_runs) / span_hours:>9.1f}"
+            f"{percentile(latencies, 50):>9.1f}{percentile(latencies, 95):>9.1f}"
+            f"{percentile(latencies, 99):>9.1f}{failures:>6}{children:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
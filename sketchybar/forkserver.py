@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import importlib
+import json  # noqa: F401
+import os
+import re  # noqa: F401
+import signal
+import socket
+import subprocess  # noqa: F401
+import sys
+import urllib.error  # noqa: F401
+import urllib.request  # noqa: F401
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent / "plugins"
+sys.path.insert(0, str(PLUGIN_DIR))
+
+import bar  # noqa: E402
+
+SOCKET_PATH = os.environ.get(
+    "BAR_FORKSERVER_SOCKET",
+    f"/tmp/sketchybar-forkserver_{os.environ.get('USER', '')}.socket",
+)
+MAX_REQUEST = 1 << 20
+
+
+def load_plugins() -> dict:
+    plugins = {}
+    for path in sorted(PLUGIN_DIR.glob("*.py")):
+        if "\ndef main(" in path.read_text():
+            plugins[path.stem] = importlib.import_module(path.stem)
+    return plugins
+
+
+def reap_children(_signum, _frame):
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def read_request(conn: socket.socket) -> tuple[bytes, list[int]]:
+    data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+    chunks = [data]
+    size = len(data)
+    while data and size < MAX_REQUEST:
+        data = conn.recv(65536)
+        chunks.append(data)
+        size += len(data)
+    return b"".join(chunks), fds
+
+
+def run_child(server, conn, module, env, fds):
+    server.close()
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+
+    os.environ.clear()
+    os.environ.update(env)
+    sys.argv = [module.__file__]
+
+    code = 0
+    try:
+        bar.run(module.main)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+        code = 1
+
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        conn.sendall(code.to_bytes(4, "big", signed=True))
+    finally:
+        os._exit(code & 0xFF)
+
+
+def handle(server, conn, plugins):
+    payload, fds = read_request(conn)
+    name, *pairs = payload.decode(errors="surrogateescape").split("\0")
+    env = dict(pair.split("=", 1) for pair in pairs if "=" in pair)
+
+    module = plugins.get(name)
+    if module is None or len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        conn.sendall((127).to_bytes(4, "big", signed=True))
+        return
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if os.fork() == 0:
+        run_child(server, conn, module, env, fds)
+
+    for fd in fds:
+        os.close(fd)
+
+
+def main():
+    plugins = load_plugins()
+    signal.signal(signal.SIGCHLD, reap_children)
+
+    try:
+        os.unlink(SOCKET_PATH)
+    except FileNotFoundError:
+        pass
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(SOCKET_PATH)
+    os.chmod(SOCKET_PATH, 0o600)
+    server.listen(16)
+
+    while True:
+        conn, _ = server.accept()
+        try:
+            handle(server, conn, plugins)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
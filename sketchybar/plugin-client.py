@@ -0,0 +1,46 @@
+#!/usr/bin/env -S python3 -I -S
+
+import os
+import socket
+import sys
+
+SOCKET_PATH = os.environ.get(
+    "BAR_FORKSERVER_SOCKET",
+    f"/tmp/sketchybar-forkserver_{os.environ.get('USER', '')}.socket",
+)
+PLUGIN_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "plugins")
+
+
+def run_direct(plugin: str) -> None:
+    script = os.path.join(PLUGIN_DIR, f"{plugin}.py")
+    os.execv(sys.executable, [sys.executable, script])
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: plugin-client.py <plugin>", file=sys.stderr)
+        sys.exit(1)
+
+    plugin = sys.argv[1]
+    payload = "\0".join([plugin] + [f"{k}={v}" for k, v in os.environ.items()])
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(SOCKET_PATH)
+            socket.send_fds(sock, [payload.encode(errors="surrogateescape")], [0, 1, 2])
+            sock.shutdown(socket.SHUT_WR)
+            reply = sock.recv(4)
+    except OSError:
+        run_direct(plugin)
+        return
+
+    if len(reply) != 4:
+        sys.exit(1)
+    code = int.from_bytes(reply, "big", signed=True)
+    if code == 127:
+        run_direct(plugin)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
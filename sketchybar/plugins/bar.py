@@ -0,0 +1,149 @@
+import fcntl
+import json
+import os
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BATCH_ENV = "BAR_BATCH"
+
+STATS_SLOTS = 8192
+STATS_MAGIC = b"BARS"
+# magic, slot count, index of the next slot to write
+STATS_HEADER = struct.Struct("<4sII")
+# item name, start, end, exit status, child process count
+STATS_RECORD = struct.Struct("<16sddhH")
+
+# What sketchybar tells a plugin about the event, kept so a replay can resend it.
+RECORDED_ENV = ("NAME", "SENDER", "INFO", "BUTTON", "MODIFIER")
+
+_children = 0
+_hooked = False
+
+
+def sketchybar(*args: str) -> None:
+    if os.environ.get(BATCH_ENV):
+        print(json.dumps(args))
+        return
+    subprocess.run(["sketchybar", *args])
+
+
+def stats_file() -> Path:
+    default = Path.home() / ".cache" / "sketchybar" / "stats.ring"
+    return Path(os.environ.get("BAR_STATS_FILE", default))
+
+
+def record_file() -> Path:
+    # Recording is on while this file exists: touch it to start, remove it to stop.
+    default = Path.home() / ".cache" / "yabaduma" / "events.jsonl"
+    return Path(os.environ.get("YABADUMA_RECORD_FILE", default))
+
+
+def record_event(plugin: str, start: float) -> None:
+    try:
+        fd = os.open(record_file(), os.O_WRONLY | os.O_APPEND)
+    except FileNotFoundError:
+        return
+    entry = {
+        "t": start,
+        "src": "bar",
+        "plugin": plugin,
+        "env": {k: os.environ[k] for k in RECORDED_ENV if k in os.environ},
+    }
+    try:
+        os.write(fd, (json.dumps(entry) + "\n").encode())
+    finally:
+        os.close(fd)
+
+
+def _count_children(event, _args):
+    global _children
+    if event in ("subprocess.Popen", "os.system", "os.posix_spawn"):
+        _children += 1
+
+
+def record_run(name: str, start: float, end: float, status: int, children: int) -> None:
+    path = stats_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        header = os.pread(fd, STATS_HEADER.size, 0)
+        if len(header) == STATS_HEADER.size:
+            magic, slots, index = STATS_HEADER.unpack(header)
+        else:
+            magic, slots, index = b"", 0, 0
+        if magic != STATS_MAGIC or slots != STATS_SLOTS:
+            slots, index = STATS_SLOTS, 0
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, STATS_HEADER.size + slots * STATS_RECORD.size)
+
+        record = STATS_RECORD.pack(
+            name.encode()[:16],
+            start,
+            end,
+            max(-32768, min(32767, status)),
+            min(children, 65535),
+        )
+        os.pwrite(fd, record, STATS_HEADER.size + index * STATS_RECORD.size)
+        os.pwrite(fd, STATS_HEADER.pack(STATS_MAGIC, slots, (index + 1) % slots), 0)
+    finally:
+        os.close(fd)
+
+
+def read_runs(path: "Path | None" = None) -> list[tuple[str, float, float, int, int]]:
+    path = path or stats_file()
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return []
+    if len(data) < STATS_HEADER.size:
+        return []
+
+    magic, slots, index = STATS_HEADER.unpack_from(data)
+    if magic != STATS_MAGIC:
+        return []
+
+    runs = []
+    for slot in range(slots):
+        offset = STATS_HEADER.size + ((index + slot) % slots) * STATS_RECORD.size
+        if offset + STATS_RECORD.size > len(data):
+            continue
+        name, start, end, status, children = STATS_RECORD.unpack_from(data, offset)
+        if start == 0:
+            continue
+        name = name.rstrip(b"\0").decode(errors="replace")
+        runs.append((name, start, end, status, children))
+    return runs
+
+
+def run(main) -> None:
+    global _children, _hooked
+    if not _hooked:
+        sys.addaudithook(_count_children)
+        _hooked = True
+
+    _children = 0
+    plugin = Path(sys.argv[0]).stem
+    name = os.environ.get("NAME", plugin)
+    start = time.time()
+    status = 0
+    try:
+        record_event(plugin, start)
+    except OSError:
+        pass
+    try:
+        main()
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        raise
+    except BaseException:
+        status = 1
+        raise
+    finally:
+        try:
+            record_run(name, start, time.time(), status, _children)
+        except OSError:
+            pass
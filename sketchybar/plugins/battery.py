@@ -4,6 +4,8 @@ import os
 import re
 import subprocess
 
+from bar import run, sketchybar
+
 ICON_FULL = "󰁹"
 ICON_HIGH = "󰂀"
 ICON_MEDIUM = "󰁾"
@@ -46,10 +48,8 @@ def main():
     name = os.environ.get("NAME", "battery")
     percentage, charging = get_battery_info()
     icon = get_icon(percentage, charging)
-    subprocess.run(
-        ["sketchybar", "--set", name, f"icon={icon}", f"label={percentage}%"]
-    )
+    sketchybar("--set", name, f"icon={icon}", f"label={percentage}%")
 
 
 if __name__ == "__main__":
-    main()
+    run(main)
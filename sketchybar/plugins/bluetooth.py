@@ -4,6 +4,8 @@ import os
 import shutil
 import subprocess
 
+from bar import run, sketchybar
+
 ICON_CONNECTED = "󰂱"
 ICON_ON = "󰂯"
 ICON_OFF = "󰂲"
@@ -33,21 +35,19 @@ def main():
     name = os.environ.get("NAME", "bluetooth")
 
     if not shutil.which("blueutil"):
-        subprocess.run(["sketchybar", "--set", name, f"icon={ICON_OFF}", "label=N/A"])
+        sketchybar("--set", name, f"icon={ICON_OFF}", "label=N/A")
         return
 
     if not get_bluetooth_power():
-        subprocess.run(["sketchybar", "--set", name, f"icon={ICON_OFF}", "label="])
+        sketchybar("--set", name, f"icon={ICON_OFF}", "label=")
         return
 
     count = get_connected_count()
     if count > 0:
-        subprocess.run(
-            ["sketchybar", "--set", name, f"icon={ICON_CONNECTED}", f"label={count}"]
-        )
+        sketchybar("--set", name, f"icon={ICON_CONNECTED}", f"label={count}")
     else:
-        subprocess.run(["sketchybar", "--set", name, f"icon={ICON_ON}", "label="])
+        sketchybar("--set", name, f"icon={ICON_ON}", "label=")
 
 
 if __name__ == "__main__":
-    main()
+    run(main)
@@ -4,6 +4,8 @@ import json
 import os
 import subprocess
 
+from bar import run, sketchybar
+
 
 def main():
     name = os.environ.get("NAME", "front_app")
@@ -19,8 +21,8 @@ def main():
     except Exception:
         app = ""
 
-    subprocess.run(["sketchybar", "--set", name, f"label={app}"])
+    sketchybar("--set", name, f"label={app}")
 
 
 if __name__ == "__main__":
-    main()
+    run(main)
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 import os
-import subprocess
+
+from bar import run, sketchybar
 
 
 ICON = "󰂚"
@@ -9,8 +10,8 @@ ICON = "󰂚"
 
 def main():
     name = os.environ.get("NAME", "notifications")
-    subprocess.run(["sketchybar", "--set", name, f"icon={ICON}"])
+    sketchybar("--set", name, f"icon={ICON}")
 
 
 if __name__ == "__main__":
-    main()
+    run(main)
@@ -5,12 +5,28 @@ import os
 import subprocess
 from pathlib import Path
 
+from bar import run, sketchybar
+
 COLORS_FILE = Path.home() / ".cache" / "wal" / "colors.json"
-TOTAL_SPACES = 7
 
 FALLBACK_ACCENT = "0xffd71921"
 FALLBACK_ICON = "0xffb0b0b0"
 
+BRACKET = "spaces_bracket"
+BRACKET_PROPS = [
+    "background.color=0x00000000",
+    "background.corner_radius=0",
+    "background.height=28",
+    "background.border_width=0",
+]
+
+
+def state_file() -> Path:
+    # what the space items on the bar look like right now; sketchybarrc starts
+    # with a forced run, which rebuilds them from scratch
+    default = Path.home() / ".cache" / "sketchybar" / "spaces.json"
+    return Path(os.environ.get("BAR_SPACES_FILE", default))
+
 
 def get_colors():
     try:
@@ -23,35 +39,116 @@ def get_colors():
         return FALLBACK_ACCENT, FALLBACK_ICON
 
 
-def get_focused_space():
+def get_spaces():
     try:
         result = subprocess.run(
-            ["yabai", "-m", "query", "--spaces", "--space"],
+            ["yabai", "-m", "query", "--spaces"],
             capture_output=True, text=True
         )
-        data = json.loads(result.stdout)
-        return data.get("index", 0)
+        return json.loads(result.stdout)
     except Exception:
-        return 0
+        return None
+
+
+def load_state():
+    try:
+        return json.loads(state_file().read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(state):
+    path = state_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+def layout(spaces):
+    # space index -> [display, icon padding left, icon padding right]. The
+    # first display's group gets wider outer padding, as it sits at the edge.
+    groups = {}
+    for space in sorted(spaces, key=lambda s: s["index"]):
+        groups.setdefault(space["display"], []).append(space["index"])
+
+    items = {}
+    first_display = min(groups) if groups else None
+    for display, indexes in groups.items():
+        for index in indexes:
+            left = right = 2
+            if display == first_display and index == indexes[0]:
+                left = 8
+            if display == first_display and index == indexes[-1]:
+                right = 8
+            items[str(index)] = [display, left, right]
+    return items
 
 
 def main():
+    name = os.environ.get("NAME", "spaces")
+    spaces = get_spaces()
+    if spaces is None:
+        return
+
     accent, icon = get_colors()
-    focused = get_focused_space()
+    focused = str(next((s["index"] for s in spaces if s.get("has-focus")), 0))
+    items = layout(spaces)
+
+    state = None if os.environ.get("SENDER") == "forced" else load_state()
+    if state is None:
+        state = {"items": {}, "focused": None, "colors": None}
+    args = []
+
+    old = state["items"]
+    restyle = state["colors"] != [accent, icon]
+    refocused = {focused, state["focused"]} if focused != state["focused"] else set()
+
+    for index in old.keys() - items.keys():
+        args += ["--remove", f"space.{index}"]
+
+    anchor = name
+    for index in sorted(items, key=int):
+        display, left, right = items[index]
+        item = f"space.{index}"
+        if index not in old:
+            args += [
+                "--add", "space", item, "left",
+                "--move", item, "after", anchor,
+                "--set", item,
+                f"space={index}",
+                f"icon={index}",
+                "label.drawing=off",
+                f"click_script=yabai -m space --focus {index}",
+            ]
+        if old.get(index) != items[index]:
+            args += [
+                "--set", item,
+                f"icon.padding_left={left}",
+                f"icon.padding_right={right}",
+            ]
+        if restyle or index not in old or index in refocused:
+            is_active = index == focused
+            args += [
+                "--set", item,
+                f"icon.color={accent if is_active else icon}",
+                f"background.drawing={'on' if is_active else 'off'}",
+            ]
+        anchor = item
 
-    args = ["sketchybar"]
-    for sid in range(1, TOTAL_SPACES + 1):
-        is_active = sid == focused
-        color = accent if is_active else icon
-        bg = "on" if is_active else "off"
+    if old.keys() != items.keys():
+        # a bracket only picks up the items that match when it is created
+        if old:
+            args += ["--remove", BRACKET]
         args += [
-            "--set", f"space.{sid}",
-            f"icon.color={color}",
-            f"background.drawing={bg}",
+            "--add", "bracket", BRACKET, "/space\\.[0-9]+/",
+            "--set", BRACKET, *BRACKET_PROPS,
         ]
 
-    subprocess.run(args)
+    if args:
+        sketchybar(*args)
+    save_state({"items": items, "focused": focused, "colors": [accent, icon]})
 
 
 if __name__ == "__main__":
-    main()
+    run(main)
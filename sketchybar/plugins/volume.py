@@ -3,6 +3,8 @@
 import os
 import subprocess
 
+from bar import run, sketchybar
+
 ICON_HIGH = "󰕾"
 ICON_MEDIUM = "󰖀"
 ICON_LOW = "󰕿"
@@ -33,7 +35,7 @@ def get_icon(volume: int) -> str:
 
 def update_volume(name: str, volume: int) -> None:
     icon = get_icon(volume)
-    subprocess.run(["sketchybar", "--set", name, f"icon={icon}", f"label={volume}%"])
+    sketchybar("--set", name, f"icon={icon}", f"label={volume}%")
 
 
 def main():
@@ -53,4 +55,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run(main)
@@ -2,10 +2,11 @@
 
 import json
 import os
-import subprocess
 from urllib.request import urlopen
 from urllib.error import URLError
 
+from bar import run, sketchybar
+
 
 WEATHER_URL = "https://wttr.in/?format=j1"
 ICON = "󰖐"
@@ -31,8 +32,8 @@ def get_weather():
 def main():
     name = os.environ.get("NAME", "weather")
     label = get_weather()
-    subprocess.run(["sketchybar", "--set", name, f"icon={ICON}", f"label={label}"])
+    sketchybar("--set", name, f"icon={ICON}", f"label={label}")
 
 
 if __name__ == "__main__":
-    main()
+    run(main)
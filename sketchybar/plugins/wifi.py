@@ -3,6 +3,8 @@
 import os
 import subprocess
 
+from bar import run, sketchybar
+
 WIFI_INTERFACE = "en0"
 
 ICON_OFF = "󰤭"
@@ -43,8 +45,8 @@ def main():
     else:
         icon = ICON_CONNECTED
 
-    subprocess.run(["sketchybar", "--set", name, f"icon={icon}", "label="])
+    sketchybar("--set", name, f"icon={icon}", "label=")
 
 
 if __name__ == "__main__":
-    main()
+    run(main)
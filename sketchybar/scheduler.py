@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent / "plugins"
+sys.path.insert(0, str(PLUGIN_DIR))
+
+from battery import get_battery_info  # noqa: E402
+
+# item -> (plugin script, interval in seconds, volatility). Intervals are
+# aligned to wall-clock multiples, so the clock lands on the minute turn and
+# jobs whose intervals divide each other wake up together. Volatility is how
+# often the item visibly changes; a volatility of None pins the interval.
+JOBS = {
+    "clock": ("clock.py", 60, None),
+    "wifi": ("wifi.py", 5, 0.5),
+    "bluetooth": ("bluetooth.py", 5, 0.3),
+    "battery": ("battery.py", 120, 0.2),
+    "weather": ("weather.py", 600, 0.1),
+}
+
+# Jobs that wait on the network. They run beside the batch and flush their own
+# results, so a slow request never holds back the items sharing its wakeup.
+DETACHED = {"weather"}
+
+# Jobs due within this many seconds of the earliest one share its wakeup.
+# The wakeup is pushed to the latest of them, so nothing ever runs early.
+TOLERANCE = 1.0
+WAKE_SLACK = 0.05
+# time.sleep does not advance while the machine sleeps, so never sleep longer
+# than this before re-checking the wall clock.
+MAX_SLEEP = 10.0
+
+# CPU budget for all jobs together, including the processes they spawn, as a
+# fraction of one core. A run also pays a share of its wall time, since a
+# plugin blocked on osascript or the network still keeps the machine awake.
+# Measured run costs are 40-60 ms per plugin (150 ms for weather), about 2.6%
+# of a core at the base intervals, most of it wifi and bluetooth every 5s.
+# On AC that fits and only a plugin that gets slower is stretched; on battery
+# wifi and bluetooth drop to every 10s.
+CPU_BUDGET_AC = 0.03
+CPU_BUDGET_BATTERY = 0.015
+WALL_WEIGHT = 0.05
+MAX_STRETCH = 8
+# a stretch is undone once the rate without it stays this far under budget
+RELAX_RATIO = 0.9
+COST_SMOOTHING = 0.3
+POWER_CHECK_INTERVAL = 120
+
+
+def next_boundary(interval: float, after: float) -> float:
+    return (math.floor(after / interval) + 1) * interval
+
+
+def cpu_seconds(usage) -> float:
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_job(name: str) -> tuple[list[str], float, float]:
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, str(PLUGIN_DIR / JOBS[name][0])],
+        env=dict(os.environ, BAR_BATCH="1", SENDER="routine", NAME=name),
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    output = proc.stdout.read()
+    proc.stdout.close()
+    # wait4 reports the rusage of the plugin together with every child it
+    # waited for, so osascript, networksetup, blueutil and pmset are counted.
+    _, status, usage = os.wait4(proc.pid, 0)
+    # Popen must know the pid is reaped, or it may later wait on a reused one
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.monotonic() - started
+
+    args = []
+    for line in output.splitlines():
+        try:
+            args += json.loads(line)
+        except json.JSONDecodeError:
+            continue
+    return args, cpu_seconds(usage), elapsed
+
+
+def flush(args: list[str]) -> None:
+    if args:
+        subprocess.run(["sketchybar", *args])
+
+
+def record_cost(cost: dict[str, float], name: str, cpu: float, elapsed: float) -> None:
+    sample = cpu + WALL_WEIGHT * elapsed
+    cost[name] += COST_SMOOTHING * (sample - cost[name])
+
+
+def run_detached(name: str, cost: dict[str, float]) -> None:
+    args, cpu, elapsed = run_job(name)
+    flush(args)
+    record_cost(cost, name, cpu, elapsed)
+
+
+def run_jobs(
+    names: list[str], cost: dict[str, float], pool: ThreadPoolExecutor, detached: dict
+) -> None:
+    # Detached jobs start alongside the batch and flush on their own; the
+    # rest are flushed in one sketchybar call once all of them are done.
+    for name in names:
+        running = detached.get(name)
+        if name in DETACHED and (running is None or running.done()):
+            detached[name] = pool.submit(run_detached, name, cost)
+
+    inline = [name for name in names if name not in DETACHED]
+    args = []
+    for name, (job_args, cpu, elapsed) in zip(inline, pool.map(run_job, inline)):
+        args += job_args
+        record_cost(cost, name, cpu, elapsed)
+    flush(args)
+
+
+def on_battery() -> bool:
+    try:
+        _, charging = get_battery_info()
+    except OSError:
+        return False
+    return not charging
+
+
+def cpu_rate(cost: dict[str, float], stretch: dict[str, int]) -> float:
+    return sum(cost[name] / (JOBS[name][1] * stretch[name]) for name in JOBS)
+
+
+def rebalance(cost: dict[str, float], stretch: dict[str, int], budget: float) -> None:
+    def score(name):
+        return cost[name] / (JOBS[name][1] * stretch[name]) / JOBS[name][2]
+
+    throttleable = [name for name in JOBS if JOBS[name][2] is not None]
+
+    while cpu_rate(cost, stretch) > budget:
+        candidates = [name for name in throttleable if stretch[name] < MAX_STRETCH]
+        if not candidates:
+            return
+        stretch[max(candidates, key=score)] *= 2
+
+    stretched = [name for name in throttleable if stretch[name] > 1]
+    if stretched:
+        name = min(stretched, key=score)
+        stretch[name] //= 2
+        if cpu_rate(cost, stretch) > budget * RELAX_RATIO:
+            stretch[name] *= 2
+
+
+def main():
+    now = time.time()
+    due = {name: now for name in JOBS}
+    cost = {name: 0.0 for name in JOBS}
+    stretch = {name: 1 for name in JOBS}
+    budget = CPU_BUDGET_AC
+    power_checked = 0.0
+    pool = ThreadPoolExecutor(max_workers=len(JOBS))
+    detached = {}
+
+    while True:
+        earliest = min(due.values())
+        wake = max(t for t in due.values() if t <= earliest + TOLERANCE)
+
+        delay = wake - time.time()
+        if delay > 0:
+            time.sleep(min(delay + WAKE_SLACK, MAX_SLEEP))
+            if time.time() < wake:
+                continue
+
+        now = time.time()
+        batch = [name for name, t in due.items() if t <= wake]
+        run_jobs(batch, cost, pool, detached)
+
+        if now - power_checked >= POWER_CHECK_INTERVAL:
+            previous = budget
+            budget = CPU_BUDGET_BATTERY if on_battery() else CPU_BUDGET_AC
+            if budget > previous:
+                # back on AC: start from the base intervals again
+                stretch = {name: 1 for name in JOBS}
+            power_checked = now
+        rebalance(cost, stretch, budget)
+
+        for name in batch:
+            interval = JOBS[name][1] * stretch[name]
+            due[name] = next_boundary(interval, max(now, due[name]))
+
+
+if __name__ == "__main__":
+    main()